@@ -1,11 +1,47 @@
+import importlib
+from typing import Any, List
+
 from . import logger
-from .metrics import mean_absolute_percentage_error, mean_percentage_bias
-from . import aws, transformers, files, metrics, sql, system, qa
-from .system import fill_message, ram_usage
-from .queue_exporter import QueueExporter
-from .aws import db, s3, connection
-from .files import data_filename
-from .recipes import dict_merge
-from .decorators import retry
-from .sql import get_query
-from .qa import df_test
+
+
+LAZY_MODULES = {
+    "aws": ".aws",
+    "transformers": ".transformers",
+    "files": ".files",
+    "metrics": ".metrics",
+    "sql": ".sql",
+    "system": ".system",
+    "qa": ".qa",
+    "db": ".aws.db",
+    "s3": ".aws.s3",
+    "connection": ".aws.connection",
+}
+LAZY_ATTRIBUTES = {
+    "mean_absolute_percentage_error": ".metrics",
+    "mean_percentage_bias": ".metrics",
+    "fill_message": ".system",
+    "ram_usage": ".system",
+    "QueueExporter": ".queue_exporter",
+    "data_filename": ".files",
+    "dict_merge": ".recipes",
+    "retry": ".decorators",
+    "get_query": ".sql",
+    "df_test": ".qa",
+}
+
+
+def __getattr__(name: str) -> Any:
+    """Import submodules and their members on first access"""
+    if name in LAZY_MODULES:
+        value = importlib.import_module(LAZY_MODULES[name], __name__)
+    elif name in LAZY_ATTRIBUTES:
+        module = importlib.import_module(LAZY_ATTRIBUTES[name], __name__)
+        value = getattr(module, name)
+    else:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    globals()[name] = value
+    return value
+
+
+def __dir__() -> List[str]:
+    return sorted({*globals(), *LAZY_MODULES, *LAZY_ATTRIBUTES})
@@ -1,30 +1,77 @@
+from __future__ import annotations
+
+import os
 import json
 import boto3
 import logging
 import psycopg2
+import functools
+import threading
+import contextlib
 import sqlalchemy as sa
-from typing import Dict, Optional
+import dataclasses as dc
+from psycopg2 import pool
+from typing import Dict, Iterator, Optional, Set, Tuple
+from botocore.client import BaseClient
 
+from .. import decorators
 from .locopy import locopy
 
 
+__all__ = [
+    "Creds",
+    "DEFAULT_SECRET_ID",
+    "SECRET_TTL",
+    "get_creds",
+    "get_redshift",
+    "get_s3_credentials",
+    "create_engine",
+    "connect",
+    "pooled_connection",
+]
+
 DEFAULT_SECRET_ID = "prod/redshift/bi_utils"
+SECRET_TTL = float(os.getenv("BI_UTILS_SECRET_TTL", 3600))
 logger = logging.getLogger(__name__)
-cached_creds: Dict[str, dict] = {}
+client_lock = threading.Lock()
+pools_lock = threading.Lock()
+pools: Dict[tuple, Tuple[pool.ThreadedConnectionPool, Creds]] = {}
+# Pools replaced after creds rotation are closed once their connections are returned
+pool_users: Dict[pool.ThreadedConnectionPool, int] = {}
+retired_pools: Set[pool.ThreadedConnectionPool] = set()
+engines_lock = threading.Lock()
+engines: Dict[tuple, Tuple[sa.engine.Engine, Creds]] = {}
+
+
+@dc.dataclass(frozen=True)
+class Creds:
+    """Database credentials"""
+
+    host: str
+    port: int
+    dbname: str
+    username: str
+    password: str = dc.field(repr=False)
 
+    @classmethod
+    def from_secret(cls, secret: dict) -> Creds:
+        return cls(**{field.name: secret.get(field.name) for field in dc.fields(cls)})
 
-def get_creds(secret_id: str = DEFAULT_SECRET_ID) -> dict:
-    """Get AWS credentials"""
-    creds = cached_creds.get(secret_id)
-    if not creds:
-        client = boto3.client("secretsmanager")
-        secret = client.get_secret_value(SecretId=secret_id)
-        creds = json.loads(secret["SecretString"])
-        if creds is None:
-            raise ValueError("There is no credentials for given secret")
-        cached_creds[secret_id] = creds
-        logger.info(f"Loaded AWS credentials ({secret_id})")
-    return creds
+
+@decorators.ttl_cache(SECRET_TTL, maxsize=32, refresh=True)
+def get_creds(secret_id: str = DEFAULT_SECRET_ID) -> Creds:
+    """
+    Get AWS credentials
+
+    Credentials are cached for `SECRET_TTL` seconds (`BI_UTILS_SECRET_TTL` env variable)
+    and refreshed in background after half of it. Use `get_creds.cache_clear` to reload them
+    """
+    secret = _secretsmanager_client().get_secret_value(SecretId=secret_id)
+    secret_creds = json.loads(secret["SecretString"])
+    if secret_creds is None:
+        raise ValueError("There is no credentials for given secret")
+    logger.info(f"Loaded AWS credentials ({secret_id})")
+    return Creds.from_secret(secret_creds)
 
 
 def get_redshift(
@@ -34,40 +81,63 @@ def get_redshift(
 ) -> locopy.Redshift:
     """Get locopy redshift connection"""
     creds = get_creds(secret_id)
-    dbname = database or creds.get("dbname")
-    host = host or creds.get("host")
+    dbname = database or creds.dbname
+    host = host or creds.host
     redshift = locopy.Redshift(
         dbapi=psycopg2,
         host=host,
-        port=creds.get("port"),
+        port=creds.port,
         dbname=dbname,
-        user=creds.get("username"),
-        password=creds.get("password"),
+        user=creds.username,
+        password=creds.password,
     )
     logger.info(f"Created {dbname} RedShift connection")
     return redshift
 
 
+def get_s3_credentials() -> str:
+    """Get AWS credentials of current boto3 session for Redshift COPY and UNLOAD"""
+    creds = _session().get_credentials()
+    if creds is None:
+        raise ValueError("There is no AWS credentials")
+    creds = creds.get_frozen_credentials()
+    creds_str = f"aws_access_key_id={creds.access_key};aws_secret_access_key={creds.secret_key}"
+    if creds.token:
+        creds_str += f";token={creds.token}"
+    return creds_str
+
+
 def create_engine(
     secret_id: str = DEFAULT_SECRET_ID,
     drivername: str = "postgresql+psycopg2",
     database: Optional[str] = None,
     host: Optional[str] = None,
 ) -> sa.engine.Engine:
-    """Create AWS connection engine"""
+    """
+    Create AWS connection engine
+
+    Engines are reused for the same credentials and db to share their connection pools
+    """
     creds = get_creds(secret_id=secret_id)
-    dbname = database or creds.get("dbname")
-    host = host or creds.get("host")
-    conn_str = sa.engine.url.URL.create(
-        host=host,
-        port=creds.get("port"),
-        database=dbname,
-        username=creds.get("username"),
-        password=creds.get("password"),
-        drivername=drivername,
-    )
-    engine = sa.create_engine(conn_str)
-    logger.info(f"Created {dbname} DB engine")
+    key = (os.getpid(), secret_id, drivername, database, host)
+    with engines_lock:
+        engine, engine_creds = engines.get(key, (None, None))
+        if engine is None or engine_creds != creds:
+            dbname = database or creds.dbname
+            conn_str = sa.engine.url.URL.create(
+                host=host or creds.host,
+                port=creds.port,
+                database=dbname,
+                username=creds.username,
+                password=creds.password,
+                drivername=drivername,
+            )
+            if engine is not None:
+                # Connections checked out of the old engine are closed on their return
+                engine.dispose()
+            engine = sa.create_engine(conn_str)
+            engines[key] = (engine, creds)
+            logger.info(f"Created {dbname} DB engine")
     return engine
 
 
@@ -79,16 +149,133 @@ def connect(
 ) -> psycopg2.extensions.connection:
     """Connect to db via psycopg2"""
     creds = get_creds(secret_id=secret_id)
-    dbname = database or creds.get("dbname")
-    host = host or creds.get("host")
+    dbname = database or creds.dbname
     conn = psycopg2.connect(
-        host=host,
-        port=creds.get("port"),
+        host=host or creds.host,
+        port=creds.port,
         dbname=dbname,
-        user=creds.get("username"),
-        password=creds.get("password"),
+        user=creds.username,
+        password=creds.password,
         options=f"--search_path={schema}" if schema else None,
     )
     schema_postfix = f"{schema} schema" if schema else ""
     logger.info(f"Connected to {dbname} DB {schema_postfix}")
     return conn
+
+
+@contextlib.contextmanager
+def pooled_connection(
+    schema: Optional[str] = None,
+    secret_id: str = DEFAULT_SECRET_ID,
+    database: Optional[str] = None,
+    host: Optional[str] = None,
+    *,
+    minconn: int = 1,
+    maxconn: int = 4,
+) -> Iterator[psycopg2.extensions.connection]:
+    """
+    Connect to db via psycopg2 connection pool
+
+    Connections are taken from a pool of up to `maxconn` connections per schema and db.
+    The transaction is committed (or rolled back on error) and the connection is returned
+    to the pool on exit. Connections broken while idle are replaced on checkout
+    """
+    conn_pool = _get_pool(schema, secret_id, database, host, minconn=minconn, maxconn=maxconn)
+    try:
+        conn = _getconn(conn_pool, maxconn)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn_pool.putconn(conn, close=bool(conn.closed))
+    finally:
+        _release_pool(conn_pool)
+
+
+@functools.lru_cache(maxsize=1)
+def _session() -> boto3.Session:
+    # Session credentials are refreshed on expiration, so they are resolved once per process
+    with client_lock:
+        return boto3.Session()
+
+
+@functools.lru_cache(maxsize=1)
+def _secretsmanager_client() -> BaseClient:
+    with client_lock:
+        return boto3.client("secretsmanager")
+
+
+def _get_pool(
+    schema: Optional[str],
+    secret_id: str,
+    database: Optional[str],
+    host: Optional[str],
+    minconn: int = 1,
+    maxconn: int = 4,
+) -> pool.ThreadedConnectionPool:
+    creds = get_creds(secret_id=secret_id)
+    key = (os.getpid(), schema, secret_id, database, host)
+    with pools_lock:
+        conn_pool, pool_creds = pools.get(key, (None, None))
+        if conn_pool is None or pool_creds != creds:
+            dbname = database or creds.dbname
+            conn_pool = pool.ThreadedConnectionPool(
+                minconn,
+                maxconn,
+                host=host or creds.host,
+                port=creds.port,
+                dbname=dbname,
+                user=creds.username,
+                password=creds.password,
+                options=f"--search_path={schema}" if schema else None,
+            )
+            if pools.get(key):
+                _retire_pool(pools[key][0])
+            pools[key] = (conn_pool, creds)
+            schema_postfix = f"{schema} schema" if schema else ""
+            logger.info(f"Created {dbname} DB connection pool {schema_postfix}")
+        pool_users[conn_pool] = pool_users.get(conn_pool, 0) + 1
+    return conn_pool
+
+
+def _getconn(
+    conn_pool: pool.ThreadedConnectionPool,
+    maxconn: int,
+) -> psycopg2.extensions.connection:
+    # Pool keeps up to `maxconn` idle connections, so a new one is taken after they're discarded
+    for _ in range(maxconn):
+        conn = conn_pool.getconn()
+        if _is_alive(conn):
+            return conn
+        conn_pool.putconn(conn, close=True)
+    return conn_pool.getconn()
+
+
+def _is_alive(conn: psycopg2.extensions.connection) -> bool:
+    """Check connection by cheap query, it may be dropped by idle timeout or network"""
+    if conn.closed:
+        return False
+    try:
+        with conn.cursor() as cursor:
+            cursor.execute("SELECT 1")
+    except (psycopg2.OperationalError, psycopg2.InterfaceError):
+        return False
+    return True
+
+
+def _retire_pool(conn_pool: pool.ThreadedConnectionPool) -> None:
+    # Connections in use are not closed under their users, the pool is closed on their return
+    if pool_users.get(conn_pool):
+        retired_pools.add(conn_pool)
+    else:
+        pool_users.pop(conn_pool, None)
+        conn_pool.closeall()
+
+
+def _release_pool(conn_pool: pool.ThreadedConnectionPool) -> None:
+    with pools_lock:
+        pool_users[conn_pool] -= 1
+        if conn_pool in retired_pools and not pool_users[conn_pool]:
+            retired_pools.discard(conn_pool)
+            del pool_users[conn_pool]
+            conn_pool.closeall()
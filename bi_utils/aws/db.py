@@ -1,20 +1,53 @@
 import os
-import glob
 import shutil
-import locopy
 import logging
+import functools
+import zlib
 import posixpath
+import collections
+import numpy as np
 import pandas as pd
+import pyarrow as pa
 import datetime as dt
-from typing import Any, Iterable, Iterator, Sequence, Optional, Union
+import pyarrow.csv as pacsv
+import pyarrow.compute as pc
+import pyarrow.dataset as pds
+from concurrent import futures
+from boto3.exceptions import S3UploadFailedError
+from botocore.exceptions import ClientError
+from psycopg2 import extras
+from typing import (
+    Any, Callable, Deque, Dict, Iterable, Iterator, List, Sequence, Optional, Tuple, Union
+)
 import pyarrow.parquet as pp
 
-from .. import files, sql
-from . import connection
+try:
+    from isal import igzip_threaded
+except ImportError:
+    igzip_threaded = None
 
+from .. import decorators, files, sql
+from . import connection, s3
 
+
+COLUMNS_TTL = 300
+# Files are both fetched and parsed in read threads, so it's sized like default thread pools
+MAX_READ_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+# Chunks are read ahead by few parts only to keep memory bounded by chunk size
+CHUNK_PREFETCH = 2
+UPLOAD_CHUNK_ROWS = 500_000
+DELETE_KEYS_LIMIT = 1000
+BOOLEAN_VALUES = pa.array(["f", "t"])
+COPY_DEFAULT_OPTIONS = ("DATEFORMAT 'auto'", "COMPUPDATE ON", "TRUNCATECOLUMNS")
+FILE_FORMATS = {".csv": "csv", ".gz": "csv", ".parquet": "parquet"}
+UNLOAD_FORMAT_OPTIONS = {
+    "csv": ("CSV", "HEADER", "GZIP", "PARALLEL ON"),
+    "parquet": ("PARQUET", "PARALLEL ON"),
+}
 logger = logging.getLogger(__name__)
 
+Filters = Union[pc.Expression, List[Tuple], List[List[Tuple]]]
+
 
 def upload_file(
     file_path: str,
@@ -31,56 +64,119 @@ def upload_file(
     host: Optional[str] = None,
     retries: int = 0,
     add_s3_timestamp_dir: bool = True,
+    s3_uri: Optional[str] = None,
 ) -> None:
-    """Upload csv or parquet file to S3 and copy to Redshift"""
+    """
+    Upload csv, gzipped csv or parquet file to S3 and copy to Redshift
+
+    Parquet dataset directory `file_path` is uploaded file by file and copied by its prefix.
+    If `s3_uri` is passed, data is copied from it without uploading `file_path`,
+    which is then used only to detect file format and columns if it exists locally.
+    `delete_s3_after` is ignored in this case, S3 files are left to the caller
+    """
 
     copy_options = []
-    if file_path.lower().endswith(".csv"):
+    detect_columns = not columns and os.path.isfile(file_path)
+    extension = os.path.splitext(file_path)[1].lower()
+    file_format = FILE_FORMATS.get(extension)
+    if file_format == "csv":
         copy_options.append("CSV")
+        if extension == ".gz":
+            copy_options.append("GZIP")
         copy_options.append("IGNOREHEADER 1")
-        if not columns:
+        if detect_columns:
             columns = files.csv_columns(file_path, separator=separator)
-    elif file_path.lower().endswith(".parquet"):
+    elif file_format == "parquet":
         copy_options.append("PARQUET")
         separator = None
-        if not columns:
-            columns = pp.ParquetFile(file_path).schema.names
+        if detect_columns:
+            columns = pp.read_schema(file_path).names
     else:
         raise ValueError(f"{os.path.basename(file_path)} file extension is not supported")
-    table_name = f"{schema}.{table}"
-    if columns:
-        table_name += f" ({','.join(columns)})"
+    table_name = f"{schema}.{table} ({','.join(columns)})" if columns else f"{schema}.{table}"
+    uploaded_paths = []
+    if not s3_uri:
+        if add_s3_timestamp_dir:
+            bucket_dir = _add_timestamp_dir(bucket_dir, posix=True)
+        bucket_path = posixpath.join(bucket_dir, os.path.basename(os.path.normpath(file_path)))
+        uploads = [(file_path, bucket_path)]
+        if os.path.isdir(file_path):
+            uploads = [
+                (path, posixpath.join(bucket_path, *os.path.relpath(path, file_path).split(os.sep)))
+                for path in _walk_files(file_path)
+            ]
+            # Trailing slash keeps other files starting with the same name out of COPY
+            bucket_path += "/"
+        for local_path, upload_path in uploads:
+            _put_file(local_path, upload_path, bucket=bucket, retries=retries)
+            uploaded_paths.append(upload_path)
+        s3_uri = f"s3://{bucket}/{bucket_path}"
+    try:
+        _redshift_copy(
+            table_name,
+            s3_uri,
+            separator=separator,
+            copy_options=copy_options,
+            secret_id=secret_id,
+            database=database,
+            host=host,
+        )
+    finally:
+        if delete_s3_after and uploaded_paths:
+            s3.delete_files(uploaded_paths, bucket=bucket)
+    logger.info(f"{os.path.basename(file_path)} is uploaded to {schema}.{table}")
+
+
+def upload_dataframe(
+    data: pd.DataFrame,
+    schema: str,
+    table: str,
+    *,
+    separator: str = ",",
+    bucket: str = "gismart-analytics",
+    bucket_dir: str = "dwh/temp",
+    columns: Optional[Sequence] = None,
+    chunk_rows: int = UPLOAD_CHUNK_ROWS,
+    delete_s3_after: bool = True,
+    secret_id: str = connection.DEFAULT_SECRET_ID,
+    database: Optional[str] = None,
+    host: Optional[str] = None,
+    retries: int = 0,
+    add_s3_timestamp_dir: bool = True,
+) -> None:
+    """Stream data to S3 as gzipped csv by `chunk_rows` rows and copy to Redshift"""
+    columns = list(columns or data.columns)
     if add_s3_timestamp_dir:
         bucket_dir = _add_timestamp_dir(bucket_dir, posix=True)
-    elif not bucket_dir.endswith("/"):
-        bucket_dir += "/"
-    with connection.get_redshift(secret_id, database=database, host=host) as redshift_locopy:
-        for attempt_number in range(retries + 1):
-            try:
-                redshift_locopy.load_and_copy(
-                    local_file=file_path,
-                    s3_bucket=bucket,
-                    s3_folder=bucket_dir,
-                    table_name=table_name,
-                    delim=separator,
-                    copy_options=copy_options,
-                    delete_s3_after=delete_s3_after,
-                    compress=False,
-                )
-            except locopy.errors.S3UploadError as error:
-                if attempt_number == retries:
-                    raise error
-                else:
-                    logger.warning(f"Failed upload attempt #{attempt_number + 1}")
-            else:
-                logger.info(f"{os.path.basename(file_path)} is uploaded to {schema}.{table}")
-                return
+    bucket_path = posixpath.join(bucket_dir, f"{table}.csv.gz")
+    s3.put_stream(
+        _gzip_csv_chunks(data, columns=columns, separator=separator, chunk_rows=chunk_rows),
+        bucket_path,
+        bucket=bucket,
+        retries=retries,
+    )
+    logger.info(f"Data is streamed to S3 ({len(data)} rows)")
+    try:
+        upload_file(
+            bucket_path,
+            schema=schema,
+            table=table,
+            separator=separator,
+            columns=columns,
+            secret_id=secret_id,
+            database=database,
+            host=host,
+            s3_uri=f"s3://{bucket}/{bucket_path}",
+        )
+    finally:
+        if delete_s3_after:
+            s3.delete_files([bucket_path], bucket=bucket)
 
 
 def download_files(
     query: str,
     data_dir: Optional[str] = None,
-    file_format: str = "csv",
+    file_format: str = "parquet",
     *,
     separator: str = ",",
     bucket: str = "gismart-analytics",
@@ -94,46 +190,43 @@ def download_files(
     max_chunk_size_mb: int = 6000,
     add_timestamp_dir: bool = True,
     add_s3_timestamp_dir: bool = True,
+    max_workers: Optional[int] = None,
 ) -> Sequence[str]:
-    """Copy data from RedShift to S3 and download csv or parquet files up to `max_chunk_size_mb`"""
-    unload_options = _get_unload_options(file_format, delete_s3_before, max_chunk_size_mb)
-    if file_format.lower() == "parquet":
-        separator = None
-    if add_s3_timestamp_dir:
-        bucket_dir = _add_timestamp_dir(bucket_dir, postfix="/", posix=True)
-    elif not bucket_dir.endswith("/"):
-        bucket_dir += "/"
+    """
+    Copy data from RedShift to S3 and download csv or parquet files up to `max_chunk_size_mb`
+
+    Files are downloaded in up to `max_workers` threads, by default it depends on
+    files and CPU number (see `s3.download_files`)
+    """
+    bucket_paths = _unload(
+        query,
+        file_format,
+        separator=separator,
+        bucket=bucket,
+        bucket_dir=bucket_dir,
+        delete_s3_before=delete_s3_before,
+        secret_id=secret_id,
+        database=database,
+        host=host,
+        max_chunk_size_mb=max_chunk_size_mb,
+        add_s3_timestamp_dir=add_s3_timestamp_dir,
+    )
+    if not bucket_paths:
+        return []
+    data_dir = data_dir or os.getcwd()
     if add_timestamp_dir:
-        data_dir = _add_timestamp_dir(data_dir or os.getcwd())
-    if data_dir and not os.path.exists(data_dir):
-        os.makedirs(data_dir)
-    with connection.get_redshift(secret_id, database=database, host=host) as redshift_locopy:
-        for attempt_number in range(retries + 1):
-            try:
-                redshift_locopy.unload_and_copy(
-                    query=query,
-                    s3_bucket=bucket,
-                    s3_folder=bucket_dir,
-                    export_path=False,
-                    raw_unload_path=data_dir,
-                    delim=separator,
-                    delete_s3_after=delete_s3_after,
-                    parallel_off=False,
-                    unload_options=unload_options,
-                )
-            except locopy.errors.S3DownloadError as error:
-                if attempt_number == retries:
-                    raise error
-                else:
-                    logger.warning(f"Failed download attempt #{attempt_number + 1}")
-            except Exception as error:
-                if "no files" in str(error).lower():
-                    return []
-                raise error
-            else:
-                logger.info(f"Data is downloaded to {file_format} files")
-                filenames = glob.glob(os.path.join(data_dir, "*_part_*"))
-                return filenames
+        data_dir = _add_timestamp_dir(data_dir)
+    filenames = s3.download_files(
+        bucket_paths,
+        data_dir,
+        bucket=bucket,
+        max_workers=max_workers,
+        retries=retries,
+    )
+    if delete_s3_after:
+        s3.delete_files(bucket_paths, bucket=bucket)
+    logger.info(f"Data is downloaded to {file_format} files")
+    return filenames
 
 
 def upload_data(
@@ -155,25 +248,56 @@ def upload_data(
     add_s3_timestamp_dir: bool = True,
     partition_cols: Optional[Sequence] = None,
 ) -> None:
-    """Save data to csv or parquet and upload it to RedShift via S3"""
+    """
+    Save data to csv or parquet and upload it to RedShift via S3
+
+    Csv data is streamed to S3 without saving `file_path` if `remove_file` is set
+    """
     filename = os.path.basename(file_path)
+    extension = os.path.splitext(file_path)[1].lower()
+    if remove_file and extension == ".csv" and not partition_cols:
+        upload_dataframe(
+            data,
+            schema=schema,
+            table=table,
+            separator=separator,
+            bucket=bucket,
+            bucket_dir=bucket_dir,
+            columns=columns,
+            delete_s3_after=delete_s3_after,
+            secret_id=secret_id,
+            database=database,
+            host=host,
+            retries=retries,
+            add_s3_timestamp_dir=add_s3_timestamp_dir,
+        )
+        return
     filedir = os.path.dirname(file_path)
-    if filedir and not os.path.exists(filedir):
-        os.mkdir(filedir)
-    if columns:
-        data = data[columns]
-    if file_path.lower().endswith(".csv"):
+    if filedir:
+        os.makedirs(filedir, exist_ok=True)
+    if extension == ".csv":
         if partition_cols:
             logger.warning(f"Partitions are not supported for csv files: {filename}")
-        data.to_csv(file_path, index=False, sep=separator)
-    elif file_path.lower().endswith(".parquet"):
-        data.to_parquet(
-            file_path,
-            partition_cols=partition_cols,
-            coerce_timestamps="us",
-            allow_truncated_timestamps=True,
-            index=False,
+        files.write_csv(data, file_path, columns=columns, separator=separator)
+        columns = list(columns or data.columns)
+    elif extension == ".parquet":
+        arrow_table = pa.Table.from_pandas(
+            data,
+            columns=list(columns) if columns else None,
+            preserve_index=False,
         )
+        write_options = {
+            "compression": "snappy",
+            "coerce_timestamps": "us",
+            "allow_truncated_timestamps": True,
+        }
+        if partition_cols:
+            pp.write_to_dataset(
+                arrow_table, file_path, partition_cols=partition_cols, **write_options
+            )
+        else:
+            pp.write_table(arrow_table, file_path, **write_options)
+        columns = arrow_table.schema.names
     else:
         raise ValueError(f"{filename} file extension is not supported")
     logger.info(f"Data is saved to {filename} ({len(data)} rows)")
@@ -184,7 +308,7 @@ def upload_data(
         separator=separator,
         bucket=bucket,
         bucket_dir=bucket_dir,
-        columns=list(data.columns),
+        columns=columns,
         secret_id=secret_id,
         database=database,
         host=host,
@@ -199,7 +323,7 @@ def upload_data(
 
 def download_data(
     query: str,
-    file_format: str = "csv",
+    file_format: str = "parquet",
     *,
     temp_dir: str = "/tmp",
     separator: str = ",",
@@ -208,6 +332,8 @@ def download_data(
     parse_dates: Optional[Sequence[str]] = None,
     parse_bools: Optional[Sequence[str]] = None,
     dtype: Optional[dict] = None,
+    columns: Optional[Sequence[str]] = None,
+    filters: Optional[Filters] = None,
     chunking: bool = False,
     secret_id: str = connection.DEFAULT_SECRET_ID,
     database: Optional[str] = None,
@@ -219,43 +345,69 @@ def download_data(
     delete_s3_after: bool = True,
     add_timestamp_dir: bool = True,
     add_s3_timestamp_dir: bool = True,
+    probe: bool = False,
 ) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
-    """Download data from Redshift via S3"""
-    filenames = download_files(
-        query=query,
-        data_dir=temp_dir,
-        file_format=file_format,
-        separator=separator,
-        bucket=bucket,
-        bucket_dir=bucket_dir,
-        secret_id=secret_id,
-        database=database,
-        host=host,
-        retries=retries,
-        max_chunk_size_mb=max_chunk_size_mb,
-        delete_s3_before=delete_s3_before,
-        delete_s3_after=delete_s3_after,
-        add_timestamp_dir=add_timestamp_dir,
-        add_s3_timestamp_dir=add_s3_timestamp_dir,
-    )
-    if filenames:
-        data = read_files(
-            filenames,
+    """
+    Download data from Redshift via S3
+
+    If `probe` is set, `query` is checked for rows before unloading to skip UNLOAD of empty data
+    """
+    if probe and not _has_rows(query, secret_id=secret_id, database=database, host=host):
+        logger.info("Query returned no rows")
+        bucket_paths = []
+    else:
+        bucket_paths = _unload(
+            query,
+            file_format,
             separator=separator,
-            parse_dates=parse_dates,
-            parse_bools=parse_bools,
-            dtype=dtype,
-            chunking=chunking,
-            remove_dir=remove_files,
+            bucket=bucket,
+            bucket_dir=bucket_dir,
+            delete_s3_before=delete_s3_before,
+            secret_id=secret_id,
+            database=database,
+            host=host,
+            max_chunk_size_mb=max_chunk_size_mb,
+            add_s3_timestamp_dir=add_s3_timestamp_dir,
         )
+    if not bucket_paths:
+        return (df for df in [pd.DataFrame()]) if chunking else pd.DataFrame()
+    data_dir = _add_timestamp_dir(temp_dir) if add_timestamp_dir else temp_dir
+    os.makedirs(data_dir, exist_ok=True)
+    if chunking and file_format.lower() == "parquet":
+        # Row groups are split from whole files so parts are downloaded before reading
+        filenames = s3.download_files(bucket_paths, data_dir, bucket=bucket, retries=retries)
+        if delete_s3_after:
+            s3.delete_files(bucket_paths, bucket=bucket)
+        fetch = None
     else:
-        data = (df for df in [pd.DataFrame()]) if chunking else pd.DataFrame()
-    return data
+        # Each part is parsed as soon as it is downloaded while other parts are downloading
+        filenames = [
+            os.path.join(data_dir, os.path.basename(bucket_path)) for bucket_path in bucket_paths
+        ]
+        fetch = functools.partial(
+            _fetch_part,
+            bucket_paths=dict(zip(filenames, bucket_paths)),
+            bucket=bucket,
+            retries=retries,
+            delete_s3_after=delete_s3_after,
+        )
+    return _read(
+        filenames,
+        separator=separator,
+        parse_dates=parse_dates,
+        parse_bools=parse_bools,
+        dtype=dtype,
+        columns=columns,
+        filters=filters,
+        chunking=chunking,
+        temp_dir=data_dir if remove_files else None,
+        fetch=fetch,
+    )
 
 
 def unload_data(
     query: str,
-    file_format: str = "csv",
+    file_format: str = "parquet",
     *,
     bucket: str = "gismart-analytics",
     bucket_dir: str = "dwh/temp",
@@ -272,13 +424,14 @@ def unload_data(
     )
     if not bucket_dir.endswith("/"):
         bucket_dir += "/"
-    with connection.get_redshift(secret_id, database=database, host=host) as redshift_locopy:
-        s3_path = redshift_locopy._generate_unload_path(bucket, bucket_dir)
-        redshift_locopy.unload(
-            query=query,
-            s3path=s3_path,
-            unload_options=unload_options,
-        )
+    _redshift_unload(
+        query,
+        f"s3://{bucket}/{bucket_dir}",
+        unload_options=unload_options,
+        secret_id=secret_id,
+        database=database,
+        host=host,
+    )
 
 
 def read_files(
@@ -288,47 +441,39 @@ def read_files(
     parse_dates: Optional[Sequence[str]] = None,
     parse_bools: Optional[Sequence[str]] = None,
     dtype: Optional[dict] = None,
+    columns: Optional[Sequence[str]] = None,
+    filters: Optional[Filters] = None,
     chunking: bool = False,
     remove_dir: bool = False,
 ) -> pd.DataFrame:
-    """Read data from csv or parquet chunks"""
-    dtype = dtype or {}
-    parse_bools = parse_bools or []
+    """
+    Read data from csv or parquet chunks
+
+    Only `columns` are loaded if passed. Rows are filtered by `filters` given as
+    arrow expression or list of tuples in `pyarrow.parquet.read_table` format
+    """
     if isinstance(file_path, str):
         if os.path.isfile(file_path):
             filenames = [file_path]
             file_dir = os.path.dirname(file_path)
         else:
-            filenames = [
-                os.path.join(file_path, filename)
-                for filename in os.listdir(file_path)
-                if os.path.isfile(os.path.join(file_path, filename))
-            ]
+            with os.scandir(file_path) as entries:
+                filenames = [entry.path for entry in entries if entry.is_file()]
             file_dir = file_path
     else:
         filenames = file_path
         file_dir = os.path.dirname(file_path[0])
-    chunks = _read_chunks(
+    return _read(
         filenames,
-        parse_bools=parse_bools,
         separator=separator,
         parse_dates=parse_dates,
+        parse_bools=parse_bools,
         dtype=dtype,
+        columns=columns,
+        filters=filters,
+        chunking=chunking,
         temp_dir=file_dir if remove_dir else None,
     )
-    if chunking:
-        return chunks
-    chunks = list(chunks)
-    if not chunks:
-        return pd.DataFrame()
-    data = pd.concat(chunks, ignore_index=True)
-    dtype = {
-        **dtype,
-        **{bool_col: "boolean" for bool_col in parse_bools}
-    }
-    data = data.astype(dtype)
-    logger.info(f"Data is loaded from files ({len(data)} rows)")
-    return data
 
 
 def update(
@@ -346,7 +491,9 @@ def update(
     """
     if params_where is None:
         params_where = {}
-    with connection.connect(schema, secret_id=secret_id, database=database, host=host) as conn:
+    with connection.pooled_connection(
+        schema, secret_id=secret_id, database=database, host=host
+    ) as conn:
         with conn.cursor() as cursor:
             set_str = sql.build_set(**params_set)
             where_str = sql.build_where(**params_where)
@@ -366,18 +513,49 @@ def delete(
     """
     Delete data from `table` in `schema` with keyword arguments `conditions`.
     It will be equal condition in case if condition value has primitive type or
-    include condition in case if it is an iterable
+    include condition in case if it is an iterable.
+    Lists longer than `DELETE_KEYS_LIMIT` are loaded to temporary tables and joined
     """
     if not conditions:
         raise ValueError("Pass at least 1 equal condition as keyword argument")
-    with connection.connect(schema, secret_id=secret_id, database=database, host=host) as conn:
+    key_conditions = {
+        column: values
+        for column, values in conditions.items()
+        if isinstance(values, (list, tuple)) and len(values) > DELETE_KEYS_LIMIT
+    }
+    where_conditions = {
+        column: value for column, value in conditions.items() if column not in key_conditions
+    }
+    with connection.pooled_connection(
+        schema, secret_id=secret_id, database=database, host=host
+    ) as conn:
         with conn.cursor() as cursor:
-            where_str = sql.build_where(**conditions)
-            query = f"DELETE FROM {schema}.{table} {where_str}"
-            cursor.execute(query)
+            stage_tables = []
+            where_str, where_params = sql.build_where_params(**where_conditions)
+            for column, values in key_conditions.items():
+                stage_table = f"delete_keys_{len(stage_tables)}"
+                cursor.execute(
+                    f"CREATE TEMP TABLE {stage_table} AS "
+                    f"SELECT {column} AS delete_key FROM {schema}.{table} WHERE 1 = 0"
+                )
+                extras.execute_values(
+                    cursor,
+                    f"INSERT INTO {stage_table} VALUES %s",
+                    [(value,) for value in values],
+                    page_size=DELETE_KEYS_LIMIT,
+                )
+                stage_tables.append(stage_table)
+                where_str += f" AND {schema}.{table}.{column} = {stage_table}.delete_key"
+            using_str = f" USING {', '.join(stage_tables)}" if stage_tables else ""
+            query = f"DELETE FROM {schema}.{table}{using_str} {where_str}"
+            cursor.execute(query, where_params)
+            # Stage tables are rolled back with transaction on errors
+            for stage_table in stage_tables:
+                cursor.execute(f"DROP TABLE {stage_table}")
     logger.info(f"Deleted data from {schema}.{table}")
 
 
+@decorators.ttl_cache(COLUMNS_TTL, maxsize=256)
 def get_columns(
     table: str,
     schema: str,
@@ -385,84 +563,695 @@ def get_columns(
     database: Optional[str] = None,
     host: Optional[str] = None,
 ) -> Sequence[str]:
-    with connection.connect(schema, secret_id=secret_id, database=database, host=host) as conn:
+    """
+    Get `table` columns in `schema`
+
+    Columns are cached for `COLUMNS_TTL` seconds, use `get_columns.cache_clear` to reload them
+    """
+    # Catalog lookup skips planning a query against the table itself
+    query = """
+        SELECT column_name
+        FROM information_schema.columns
+        WHERE table_schema = %s AND table_name = %s
+        ORDER BY ordinal_position
+    """
+    with connection.pooled_connection(
+        schema, secret_id=secret_id, database=database, host=host
+    ) as conn:
+        with conn.cursor() as cursor:
+            # Unquoted identifiers are stored in lower case
+            cursor.execute(query, (schema.lower(), table.lower()))
+            columns = tuple(row[0] for row in cursor.fetchall())
+    if not columns:
+        raise ValueError(f"Table {schema}.{table} is not found")
+    return columns
+
+
+def _put_file(file_path: str, bucket_path: str, bucket: str, retries: int = 0) -> None:
+    for attempt_number in range(retries + 1):
+        try:
+            s3.put_file(file_path, bucket_path, bucket=bucket)
+        except (ClientError, S3UploadFailedError) as error:
+            if attempt_number == retries:
+                raise error
+            else:
+                logger.warning(f"Failed upload attempt #{attempt_number + 1}")
+        else:
+            return
+
+
+def _walk_files(dir_path: str) -> List[str]:
+    return sorted(
+        os.path.join(root, filename)
+        for root, _, filenames in os.walk(dir_path)
+        for filename in filenames
+    )
+
+
+def _gzip_csv_chunks(
+    data: pd.DataFrame,
+    columns: Sequence[str],
+    separator: str = ",",
+    chunk_rows: int = UPLOAD_CHUNK_ROWS,
+) -> Iterator[bytes]:
+    """Yield data as one gzip stream of csv chunks with header"""
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+    for chunk in files.csv_chunks(
+        data, columns=columns, separator=separator, chunk_rows=chunk_rows
+    ):
+        yield compressor.compress(chunk)
+    yield compressor.flush()
+
+
+def _unload(
+    query: str,
+    file_format: str = "parquet",
+    separator: Optional[str] = ",",
+    bucket: str = "gismart-analytics",
+    bucket_dir: str = "dwh/temp",
+    delete_s3_before: bool = False,
+    secret_id: str = connection.DEFAULT_SECRET_ID,
+    database: Optional[str] = None,
+    host: Optional[str] = None,
+    max_chunk_size_mb: int = 6000,
+    add_s3_timestamp_dir: bool = True,
+) -> List[str]:
+    """Unload query data to S3 and return bucket paths of generated files"""
+    unload_options = _get_unload_options(file_format, delete_s3_before, max_chunk_size_mb)
+    if file_format.lower() == "csv" and separator:
+        unload_options.append(f"DELIMITER '{separator}'")
+    if add_s3_timestamp_dir:
+        bucket_dir = _add_timestamp_dir(bucket_dir, postfix="/", posix=True)
+    elif not bucket_dir.endswith("/"):
+        bucket_dir += "/"
+    unloaded_paths = _redshift_unload(
+        query,
+        f"s3://{bucket}/{bucket_dir}",
+        unload_options=unload_options,
+        secret_id=secret_id,
+        database=database,
+        host=host,
+    )
+    if not unloaded_paths:
+        logger.info("No files generated from unload")
+        return []
+    bucket_prefix = f"s3://{bucket}/"
+    return [path[len(bucket_prefix):] for path in unloaded_paths]
+
+
+def _redshift_copy(
+    table_name: str,
+    s3_uri: str,
+    separator: Optional[str] = ",",
+    copy_options: Sequence[str] = (),
+    secret_id: str = connection.DEFAULT_SECRET_ID,
+    database: Optional[str] = None,
+    host: Optional[str] = None,
+) -> None:
+    """Run COPY of `s3_uri` files to `table_name`"""
+    copy_options = list(copy_options)
+    if "PARQUET" not in copy_options:
+        option_names = {option.split()[0].upper() for option in copy_options}
+        copy_options += [
+            option for option in COPY_DEFAULT_OPTIONS if option.split()[0] not in option_names
+        ]
+    if separator:
+        copy_options.insert(0, f"DELIMITER '{separator}'")
+    credentials = connection.get_s3_credentials()
+    query = (
+        f"COPY {table_name} FROM '{s3_uri}' "
+        f"CREDENTIALS '{credentials}' {' '.join(copy_options)}"
+    )
+    with connection.pooled_connection(secret_id=secret_id, database=database, host=host) as conn:
         with conn.cursor() as cursor:
-            query = f"SELECT * FROM {schema}.{table} LIMIT 0"
             cursor.execute(query)
-            return [desc[0] for desc in cursor.description]
+
+
+def _redshift_unload(
+    query: str,
+    s3_uri: str,
+    unload_options: Sequence[str] = (),
+    secret_id: str = connection.DEFAULT_SECRET_ID,
+    database: Optional[str] = None,
+    host: Optional[str] = None,
+) -> List[str]:
+    """Run UNLOAD of `query` data to `s3_uri` and return S3 URIs of unloaded files"""
+    query = query.replace("'", r"\'")
+    credentials = connection.get_s3_credentials()
+    unload_query = (
+        f"UNLOAD ('{query}') TO '{s3_uri}' "
+        f"CREDENTIALS '{credentials}' {' '.join(unload_options)}"
+    )
+    with connection.pooled_connection(secret_id=secret_id, database=database, host=host) as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(unload_query)
+            # Last query id is session scoped, so files are listed on the same connection
+            cursor.execute(
+                "SELECT path FROM stl_unload_log WHERE query = pg_last_query_id() ORDER BY path"
+            )
+            return [row[0].strip() for row in cursor.fetchall()]
+
+
+def _has_rows(
+    query: str,
+    secret_id: str = connection.DEFAULT_SECRET_ID,
+    database: Optional[str] = None,
+    host: Optional[str] = None,
+) -> bool:
+    query = query.strip().rstrip(";")
+    with connection.pooled_connection(secret_id=secret_id, database=database, host=host) as conn:
+        with conn.cursor() as cursor:
+            cursor.execute(f"SELECT 1 WHERE EXISTS (SELECT 1 FROM ({query}) AS probe LIMIT 1)")
+            return cursor.fetchone() is not None
 
 
 def _add_timestamp_dir(dir_path: str, postfix: str = "", posix: bool = False) -> str:
-    timestamp = dt.datetime.now().strftime("%Y-%m-%d_%H-%M-%S_%f") + postfix
-    if posix:
-        dir_path = posixpath.join(dir_path, timestamp)
-    else:
-        dir_path = os.path.join(dir_path, timestamp)
-    return dir_path
+    now = dt.datetime.now()
+    timestamp = f"{now:%Y-%m-%d_%H-%M-%S}_{now.microsecond:06d}{postfix}"
+    join = posixpath.join if posix else os.path.join
+    return join(dir_path, timestamp)
 
 
 def _get_unload_options(
-    file_format: str = "csv",
+    file_format: str = "parquet",
     delete_s3_before: bool = False,
     max_chunk_size_mb: int = 6000,
     partition_by: Optional[list[str]] = None,
 ) -> list[str]:
-    max_chunk_size_opt = f"MAXFILESIZE {max_chunk_size_mb} MB"
-    if file_format.lower() == "csv":
-        unload_options = ["CSV", "HEADER", "GZIP", "PARALLEL ON", max_chunk_size_opt]
-    elif file_format.lower() == "parquet":
-        unload_options = ["PARQUET", "PARALLEL ON", max_chunk_size_opt]
-    else:
-        raise ValueError(f"{file_format} file format is not supported")
-    if delete_s3_before:
-        unload_options.append("CLEANPATH")
-    else:
-        unload_options.append("ALLOWOVERWRITE")
+    try:
+        unload_options = list(UNLOAD_FORMAT_OPTIONS[file_format.lower()])
+    except KeyError:
+        raise ValueError(f"{file_format} file format is not supported") from None
+    unload_options.append(f"MAXFILESIZE {max_chunk_size_mb} MB")
+    unload_options.append("CLEANPATH" if delete_s3_before else "ALLOWOVERWRITE")
     if partition_by:
         unload_options.append(f"PARTITION BY ({', '.join(partition_by)}) INCLUDE")
     return unload_options
 
 
+def _read(
+    filenames: Sequence[str],
+    separator: str = ",",
+    parse_dates: Optional[Sequence[str]] = None,
+    parse_bools: Optional[Sequence[str]] = None,
+    dtype: Optional[dict] = None,
+    columns: Optional[Sequence[str]] = None,
+    filters: Optional[Filters] = None,
+    chunking: bool = False,
+    temp_dir: Optional[str] = None,
+    fetch: Optional[Callable[[str], Any]] = None,
+) -> Union[pd.DataFrame, Iterator[pd.DataFrame]]:
+    """Read `filenames` calling `fetch` on each file in reading thread before it is read"""
+    dtype = dtype or {}
+    parse_bools = parse_bools or []
+    filter_expression = _filter_expression(filters)
+    if chunking:
+        return _read_chunks(
+            filenames,
+            parse_bools=parse_bools,
+            separator=separator,
+            parse_dates=parse_dates,
+            dtype=dtype,
+            columns=columns,
+            filter_expression=filter_expression,
+            temp_dir=temp_dir,
+            fetch=fetch,
+        )
+    is_parquet = all(_file_format(filename) == "parquet" for filename in filenames)
+    if filenames and is_parquet and fetch is None:
+        data = _read_parquet_dataset(
+            filenames,
+            parse_bools=parse_bools,
+            dtype=dtype,
+            columns=columns,
+            filter_expression=filter_expression,
+            temp_dir=temp_dir,
+        )
+    else:
+        data = _read_tables(
+            filenames,
+            parse_bools=parse_bools,
+            separator=separator,
+            parse_dates=parse_dates,
+            dtype=dtype,
+            columns=columns,
+            filter_expression=filter_expression,
+            temp_dir=temp_dir,
+            fetch=fetch,
+        )
+    if data.empty:
+        return pd.DataFrame()
+    dtype = {
+        **dtype,
+        **{bool_col: "boolean" for bool_col in parse_bools}
+    }
+    data = _astype(data, dtype)
+    logger.info(f"Data is loaded from files ({len(data)} rows)")
+    return data
+
+
 def _read_chunks(
     filenames: Sequence[str],
     parse_bools: Iterable[str],
     separator: str = ",",
     parse_dates: Optional[Sequence[str]] = None,
     dtype: Optional[dict] = None,
+    columns: Optional[Sequence[str]] = None,
+    filter_expression: Optional[pc.Expression] = None,
     temp_dir: Optional[str] = None,
+    fetch: Optional[Callable[[str], Any]] = None,
 ) -> Iterator[pd.DataFrame]:
-    boolean_values = {"t": True, "f": False}
-    converters = {col: lambda value: boolean_values.get(value, pd.NA) for col in parse_bools}
     full_dtype = {
         **dtype,
         **{bool_col: "boolean" for bool_col in parse_bools}
     }
+    if fetch is None and filenames and all(
+        _file_format(filename) == "parquet" for filename in filenames
+    ):
+        # Parquet files are read by row groups of one dataset to bound memory by row group size
+        dataset = pds.dataset(filenames, format="parquet")
+        pieces = [
+            row_group
+            for fragment in dataset.get_fragments()
+            for row_group in fragment.split_by_row_group()
+        ]
+        read_piece = functools.partial(
+            _read_fragment,
+            parse_bools=parse_bools,
+            dtype=full_dtype,
+            columns=columns,
+            filter_expression=filter_expression,
+        )
+    else:
+        pieces = filenames
+        read_piece = functools.partial(
+            _read_file,
+            separator=separator,
+            parse_bools=parse_bools,
+            parse_dates=parse_dates,
+            dtype=full_dtype,
+            columns=columns,
+            filter_expression=filter_expression,
+        )
+        if temp_dir:
+            read_piece = _removed(read_piece)
+        if fetch:
+            read_piece = _fetched(fetch, read_piece)
+    # Row groups share files, so they're removed after the last one, other files right after reading
+    piece_paths = [getattr(piece, "path", None) for piece in pieces]
+    last_pieces = {path: i for i, path in enumerate(piece_paths)}
     try:
-        for i, filename in enumerate(filenames):
-            if filename.lower().endswith((".csv", ".gz")):
-                chunk = pd.read_csv(
-                    filename,
-                    na_values=[""],
-                    converters=converters,
-                    keep_default_na=False,
-                    parse_dates=parse_dates,
-                    sep=separator,
-                    dtype=dtype,
-                    low_memory=False,
-                )
-            elif filename.lower().endswith(".parquet"):
-                chunk = pd.read_parquet(filename)
-                if not chunk.empty:
-                    chunk = chunk.astype(full_dtype)
-            else:
-                raise ValueError(f"{os.path.basename(filename)} file extension is not supported")
+        workers = min(_read_workers(len(pieces)), CHUNK_PREFETCH)
+        chunks = _prefetch(read_piece, pieces, workers=workers)
+        for i, (path, chunk) in enumerate(zip(piece_paths, chunks)):
             if chunk.empty:
                 logger.debug(f"Chunk #{i + 1} is empty")
             else:
                 logger.debug(f"Loaded chunk #{i + 1}")
                 yield chunk
-            if temp_dir:
-                os.remove(filename)
+            if temp_dir and path and last_pieces[path] == i:
+                os.remove(path)
     finally:
         if temp_dir:
             shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def _fetched(fetch: Callable[[str], Any], read: Callable[[str], Any]) -> Callable[[str], Any]:
+    """Wrap `read` to `fetch` file right before reading it"""
+
+    def read_fetched(filename: str) -> Any:
+        fetch(filename)
+        return read(filename)
+
+    return read_fetched
+
+
+def _removed(read: Callable[[str], Any]) -> Callable[[str], Any]:
+    """Wrap `read` to remove file right after reading it"""
+
+    def read_removed(filename: str) -> Any:
+        result = read(filename)
+        os.remove(filename)
+        return result
+
+    return read_removed
+
+
+def _fetch_part(
+    filename: str,
+    bucket_paths: Dict[str, str],
+    bucket: str = "gismart-analytics",
+    retries: int = 0,
+    delete_s3_after: bool = True,
+) -> None:
+    """Download unloaded part to `filename` from its path in `bucket_paths`"""
+    bucket_path = bucket_paths[filename]
+    s3.get_file(bucket_path, filename, bucket=bucket, retries=retries)
+    if delete_s3_after:
+        s3.delete_files([bucket_path], bucket=bucket)
+
+
+def _read_workers(count: int) -> int:
+    return max(min(MAX_READ_WORKERS, count), 1)
+
+
+def _prefetch(func: Callable[[Any], Any], items: Iterable, workers: int) -> Iterator:
+    """Map `func` over `items` in threads computing up to `workers` results ahead"""
+    executor = futures.ThreadPoolExecutor(workers)
+    pending: Deque[futures.Future] = collections.deque()
+    try:
+        for item in items:
+            pending.append(executor.submit(func, item))
+            if len(pending) >= workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+def _read_tables(
+    filenames: Sequence[str],
+    parse_bools: Iterable[str],
+    separator: str = ",",
+    parse_dates: Optional[Sequence[str]] = None,
+    dtype: Optional[dict] = None,
+    columns: Optional[Sequence[str]] = None,
+    filter_expression: Optional[pc.Expression] = None,
+    temp_dir: Optional[str] = None,
+    fetch: Optional[Callable[[str], Any]] = None,
+) -> pd.DataFrame:
+    """Read files to arrow tables in threads and convert them to pandas at once"""
+    read_table = functools.partial(
+        _read_table,
+        separator=separator,
+        parse_bools=parse_bools,
+        parse_dates=parse_dates,
+        dtype=dtype,
+        columns=columns,
+        filter_expression=filter_expression,
+    )
+    if temp_dir:
+        read_table = _removed(read_table)
+    if fetch:
+        read_table = _fetched(fetch, read_table)
+    try:
+        tables = [
+            table
+            for table in _prefetch(read_table, filenames, workers=_read_workers(len(filenames)))
+            if table.num_columns
+        ]
+    finally:
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+    if not tables:
+        return pd.DataFrame()
+    table = pa.concat_tables(tables, promote_options="permissive")
+    del tables
+    logger.debug(f"Loaded {len(filenames)} files")
+    table = _cast_null_dates(table, parse_dates or [])
+    return _to_pandas(table, bool_columns=parse_bools)
+
+
+def _read_file(
+    filename: str,
+    separator: str = ",",
+    parse_bools: Iterable[str] = (),
+    parse_dates: Optional[Sequence[str]] = None,
+    dtype: Optional[dict] = None,
+    columns: Optional[Sequence[str]] = None,
+    filter_expression: Optional[pc.Expression] = None,
+) -> pd.DataFrame:
+    table = _read_table(
+        filename,
+        separator=separator,
+        parse_bools=parse_bools,
+        parse_dates=parse_dates,
+        dtype=dtype,
+        columns=columns,
+        filter_expression=filter_expression,
+    )
+    table = _cast_null_dates(table, parse_dates or [])
+    chunk = _to_pandas(table, bool_columns=parse_bools)
+    if not chunk.empty and dtype:
+        chunk = _astype(chunk, dtype)
+    return chunk
+
+
+def _read_fragment(
+    fragment: pds.Fragment,
+    parse_bools: Iterable[str] = (),
+    dtype: Optional[dict] = None,
+    columns: Optional[Sequence[str]] = None,
+    filter_expression: Optional[pc.Expression] = None,
+) -> pd.DataFrame:
+    table = fragment.to_table(
+        columns=list(columns) if columns else None,
+        filter=filter_expression,
+        use_threads=True,
+    )
+    chunk = _to_pandas(_cast_table(table, dtype or {}), bool_columns=parse_bools)
+    if not chunk.empty and dtype:
+        chunk = _astype(chunk, dtype)
+    return chunk
+
+
+def _read_table(
+    filename: str,
+    separator: str = ",",
+    parse_bools: Iterable[str] = (),
+    parse_dates: Optional[Sequence[str]] = None,
+    dtype: Optional[dict] = None,
+    columns: Optional[Sequence[str]] = None,
+    filter_expression: Optional[pc.Expression] = None,
+) -> pa.Table:
+    file_format = _file_format(filename)
+    if file_format == "parquet":
+        table = pp.read_table(filename, columns=columns, filters=filter_expression)
+        return _cast_table(table, dtype or {})
+    elif file_format != "csv":
+        raise ValueError(f"{os.path.basename(filename)} file extension is not supported")
+    table = _read_csv(
+        filename,
+        separator=separator,
+        parse_bools=parse_bools,
+        parse_dates=parse_dates,
+        dtype=dtype,
+        # Filter may reference columns outside of `columns` so select them after filtering
+        columns=columns if filter_expression is None else None,
+    )
+    if table.num_columns and filter_expression is not None:
+        table = table.filter(filter_expression)
+        if columns:
+            table = table.select(columns)
+    return table
+
+
+def _read_parquet_dataset(
+    filenames: Sequence[str],
+    parse_bools: Iterable[str] = (),
+    dtype: Optional[dict] = None,
+    columns: Optional[Sequence[str]] = None,
+    filter_expression: Optional[pc.Expression] = None,
+    temp_dir: Optional[str] = None,
+) -> pd.DataFrame:
+    """Read parquet files as one dataset using arrow threads"""
+    try:
+        dataset = pds.dataset(filenames, format="parquet")
+        table = dataset.to_table(
+            columns=list(columns) if columns else None,
+            filter=filter_expression,
+            use_threads=True,
+        )
+        logger.debug(f"Loaded {len(filenames)} parquet files")
+        return _to_pandas(_cast_table(table, dtype or {}), bool_columns=parse_bools)
+    finally:
+        if temp_dir:
+            shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def _read_csv(
+    filename: str,
+    separator: str = ",",
+    parse_bools: Iterable[str] = (),
+    parse_dates: Optional[Sequence[str]] = None,
+    dtype: Optional[dict] = None,
+    columns: Optional[Sequence[str]] = None,
+) -> pa.Table:
+    """Read csv file to arrow table by multithreaded parser"""
+    # Date columns are inferred to keep time zones and converted after reading
+    column_types = {
+        **_arrow_types(dtype or {}),
+        **{bool_col: pa.string() for bool_col in parse_bools},
+    }
+    try:
+        table = _parse_csv(filename, separator, column_types, columns)
+        # Other columns inferred as dates or booleans are read again as strings like in pandas
+        string_types = {
+            field.name: pa.string()
+            for field in table.schema
+            if field.name not in column_types
+            and field.name not in (parse_dates or [])
+            and _is_parsed_type(field.type)
+        }
+        if string_types:
+            table = _parse_csv(filename, separator, {**column_types, **string_types}, columns)
+    except pa.ArrowInvalid as error:
+        if "empty" in str(error).lower():
+            return pa.table({})
+        raise error
+    for bool_col in parse_bools:
+        col_index = table.schema.get_field_index(bool_col)
+        if col_index >= 0:
+            bool_values = _parse_bools(table.column(col_index))
+            table = table.set_column(col_index, bool_col, bool_values)
+    for date_col in parse_dates or []:
+        col_index = table.schema.get_field_index(date_col)
+        if col_index >= 0:
+            date_values = _parse_dates(table.column(col_index))
+            table = table.set_column(col_index, date_col, date_values)
+    return table
+
+
+def _parse_csv(
+    filename: str,
+    separator: str,
+    column_types: Dict[str, pa.DataType],
+    columns: Optional[Sequence[str]] = None,
+) -> pa.Table:
+    with _open_csv(filename) as source:
+        return pacsv.read_csv(
+            source,
+            read_options=pacsv.ReadOptions(block_size=64 << 20),
+            parse_options=pacsv.ParseOptions(delimiter=separator, newlines_in_values=True),
+            convert_options=pacsv.ConvertOptions(
+                column_types=column_types,
+                include_columns=columns,
+                null_values=[""],
+                strings_can_be_null=True,
+            ),
+        )
+
+
+def _is_parsed_type(data_type: pa.DataType) -> bool:
+    return (
+        pa.types.is_boolean(data_type)
+        or pa.types.is_date(data_type)
+        or pa.types.is_time(data_type)
+        or pa.types.is_timestamp(data_type)
+    )
+
+
+def _open_csv(filename: str) -> Any:
+    """Open csv file decompressing gzip by ISA-L in background thread if `isal` is installed"""
+    if os.path.splitext(filename)[1].lower() != ".gz":
+        # Plain files are parsed straight from page cache without copying to read buffers
+        return pa.memory_map(filename)
+    if igzip_threaded:
+        return igzip_threaded.open(filename, "rb")
+    return pa.input_stream(filename, compression="gzip")
+
+
+def _file_format(filename: str) -> Optional[str]:
+    return FILE_FORMATS.get(os.path.splitext(filename)[1].lower())
+
+
+def _to_pandas(table: pa.Table, bool_columns: Iterable[str] = ()) -> pd.DataFrame:
+    """Convert arrow table to pandas with boolean `bool_columns` as nullable booleans"""
+    bool_columns = set(bool_columns)
+    bool_fields = [
+        (col_index, field.name)
+        for col_index, field in enumerate(table.schema)
+        if field.name in bool_columns and pa.types.is_boolean(field.type)
+    ]
+    # Nullable booleans are built from arrow buffers instead of intermediate object arrays
+    if len(bool_fields) == sum(pa.types.is_boolean(field.type) for field in table.schema):
+        # Columns of the same table are released while converted, derived tables would keep them
+        return table.to_pandas(
+            split_blocks=True,
+            self_destruct=True,
+            types_mapper={pa.bool_(): pd.BooleanDtype()}.get,
+        )
+    bool_values = [pd.BooleanDtype().__from_arrow__(table.column(i)) for i, _ in bool_fields]
+    table = table.drop_columns([col for _, col in bool_fields])
+    data = table.to_pandas(split_blocks=True, self_destruct=True)
+    for (col_index, col), values in zip(bool_fields, bool_values):
+        data.insert(col_index, col, values)
+    return data
+
+
+def _parse_bools(values: pa.ChunkedArray) -> pa.ChunkedArray:
+    """Map "f" and "t" values to booleans and other values to nulls"""
+    return pc.index_in(values, value_set=BOOLEAN_VALUES).cast(pa.bool_())
+
+
+def _filter_expression(filters: Optional[Filters]) -> Optional[pc.Expression]:
+    """Convert list of filter tuples to arrow expression"""
+    if filters is None or isinstance(filters, pc.Expression):
+        return filters
+    return pp.filters_to_expression(filters)
+
+
+def _astype(data: pd.DataFrame, dtype: dict) -> pd.DataFrame:
+    """Cast only loaded columns which were not parsed to their `dtype` already"""
+    dtypes = data.dtypes
+    pending_dtype = {
+        col: col_type
+        for col, col_type in dtype.items()
+        if col in dtypes
+        and dtypes[col] != col_type
+        # Object strings are kept as is, `astype(str)` would turn NULLs into "None"
+        and not (dtypes[col] == object and _is_str_type(col_type))
+    }
+    return data.astype(pending_dtype, copy=False) if pending_dtype else data
+
+
+def _is_str_type(col_type: Any) -> bool:
+    try:
+        return np.dtype(col_type).kind in "OSU"
+    except TypeError:
+        return False
+
+
+def _parse_dates(values: pa.ChunkedArray) -> pa.ChunkedArray:
+    """Cast inferred dates and timestamps to nanosecond timestamps keeping time zone"""
+    if pa.types.is_null(values.type):
+        # Parts of NULLs take time zone of other parts when tables are concatenated
+        return values
+    time_zone = getattr(values.type, "tz", None)
+    return values.cast(pa.timestamp("ns", tz=time_zone))
+
+
+def _cast_null_dates(table: pa.Table, parse_dates: Sequence[str]) -> pa.Table:
+    """Cast date columns of only NULLs to naive nanosecond timestamps"""
+    for date_col in parse_dates:
+        col_index = table.schema.get_field_index(date_col)
+        if col_index >= 0 and pa.types.is_null(table.schema.field(col_index).type):
+            date_values = table.column(col_index).cast(pa.timestamp("ns"))
+            table = table.set_column(col_index, date_col, date_values)
+    return table
+
+
+def _cast_table(table: pa.Table, dtype: dict) -> pa.Table:
+    """Cast numeric columns to `dtype` before converting to pandas"""
+    arrow_types = {
+        col: col_type
+        for col, col_type in _arrow_types(dtype).items()
+        if pa.types.is_integer(col_type) or pa.types.is_floating(col_type)
+    }
+    schema = pa.schema(
+        field.with_type(arrow_types.get(field.name, field.type)) for field in table.schema
+    )
+    # Unsafe cast truncates and wraps numbers like pandas `astype`
+    return table.cast(schema, safe=False) if schema != table.schema else table
+
+
+def _arrow_types(dtype: dict) -> Dict[str, pa.DataType]:
+    """Convert numpy compatible `dtype` values to arrow types"""
+    arrow_types = {}
+    for col, col_type in dtype.items():
+        try:
+            arrow_types[col] = pa.from_numpy_dtype(np.dtype(col_type))
+        except (TypeError, pa.ArrowNotImplementedError):
+            continue
+    return arrow_types
@@ -8,7 +8,7 @@ class ProgressPercentage:
     """
     Modified locopy progressbar
 
-    Reduced update frequency, added line break when completed
+    Updated only when completed tenth changes, added line break when completed
     """
 
     def __init__(self, filename: str) -> None:
@@ -16,21 +16,20 @@ class ProgressPercentage:
         self._size = os.path.getsize(filename)
         self._seen_so_far = 0
         self._lock = threading.Lock()
-        self._update_freq = 10
-        self._updated_count = 0
+        self._tenths = -1
 
     def __call__(self, bytes_amount: int) -> None:
+        # Progress is written by transfer threads only when it grows, up to 11 times
         with self._lock:
             self._seen_so_far += bytes_amount
-            self._updated_count += 1
-            percentage = self._seen_so_far / self._size
-            if self._updated_count % self._update_freq == 0 or percentage == 1.0:
-                sys.stdout.write(
-                    "\rTransfering [{}] {:.0%}".format("#" * int(percentage * 10), percentage)
-                )
-                if percentage == 1.0:
-                    sys.stdout.write("\n")
-                sys.stdout.flush()
+            tenths = self._seen_so_far * 10 // max(self._size, 1)
+            if tenths <= self._tenths:
+                return
+            self._tenths = tenths
+            sys.stdout.write(f"\rTransfering [{'#' * tenths}] {tenths * 10}%")
+            if self._seen_so_far >= self._size:
+                sys.stdout.write("\n")
+            sys.stdout.flush()
 
 
 locopy.utility.ProgressPercentage.__init__ = ProgressPercentage.__init__
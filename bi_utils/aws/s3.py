@@ -1,10 +1,25 @@
 import os
 import boto3
 import logging
+import functools
+import threading
+from concurrent import futures
+from boto3.s3.transfer import TransferConfig
+from botocore.client import BaseClient
+from botocore.config import Config
+from boto3.exceptions import S3UploadFailedError
 from botocore.exceptions import ClientError
-from typing import Optional
+from typing import Iterable, List, Optional, Sequence
 
 
+DOWNLOAD_WORKERS = 16
+DELETE_BATCH_SIZE = 1000
+MULTIPART_PART_SIZE = 8 << 20
+TRANSFER_PART_SIZE = 64 << 20
+TRANSFER_CONCURRENCY = 16
+# Retries of default boto3 client, requests aren't retried fewer times than by it
+DEFAULT_RETRIES = 4
+client_lock = threading.Lock()
 logger = logging.getLogger(__name__)
 
 
@@ -13,15 +28,20 @@ def upload_file(
     bucket_dir: str = "dwh/temp",
     *,
     bucket: str = "gismart-analytics",
+    max_concurrency: int = TRANSFER_CONCURRENCY,
 ) -> bool:
     """Upload file to S3"""
-    client = boto3.client("s3")
     filename = os.path.basename(file_path)
     try:
-        client.upload_file(file_path, bucket, f"{bucket_dir}/{filename}")
+        put_file(
+            file_path,
+            f"{bucket_dir}/{filename}",
+            bucket=bucket,
+            max_concurrency=max_concurrency,
+        )
         logger.info(f"{filename} is exported to S3 ({bucket_dir})")
         return True
-    except ClientError as e:
+    except (ClientError, S3UploadFailedError) as e:
         logger.error(f"Failed to upload {filename} from {bucket_dir}: {e}")
         return False
 
@@ -37,9 +57,9 @@ def download_file(
     bucket_dir = os.path.dirname(bucket_path)
     if os.path.isdir(file_path):
         file_path = os.path.join(file_path, filename)
-    client = boto3.client("s3")
+    client = _client(TRANSFER_CONCURRENCY)
     try:
-        client.download_file(bucket, bucket_path, file_path)
+        client.download_file(bucket, bucket_path, file_path, Config=_transfer_config())
         logger.info(f"{filename} downloaded from S3 ({bucket_dir})")
         return True
     except ClientError as e:
@@ -53,24 +73,185 @@ def download_dir(
     *,
     bucket: str = "gismart-analytics",
     files_prefix: Optional[str] = None,
+    max_workers: Optional[int] = None,
 ) -> bool:
-    """Download directory contents from S3 without subfolders"""
-    resource = boto3.resource("s3")
-    bucket_resource = resource.Bucket(bucket)
+    """Download directory contents from S3 without subfolders in parallel threads"""
     if not bucket_dir_path.endswith("/"):
         bucket_dir_path += "/"
     try:
-        for obj in bucket_resource.objects.filter(Prefix=bucket_dir_path):
-            filename = os.path.basename(obj.key)
-            if files_prefix:
-                filename = f"{files_prefix}{filename}"
-            if not os.path.exists(dir_path):
-                os.makedirs(dir_path)
-            file_path = os.path.join(dir_path, filename)
-            bucket_resource.download_file(obj.key, file_path)
-            logger.debug(f"{filename} downloaded from S3")
+        paginator = _client().get_paginator("list_objects_v2")
+        bucket_paths = [
+            obj["Key"]
+            for page in paginator.paginate(Bucket=bucket, Prefix=bucket_dir_path)
+            for obj in page.get("Contents", [])
+            if not obj["Key"].endswith("/")
+        ]
+        file_paths = [
+            os.path.join(dir_path, f"{files_prefix or ''}{os.path.basename(bucket_path)}")
+            for bucket_path in bucket_paths
+        ]
+        os.makedirs(dir_path, exist_ok=True)
+        _download(bucket_paths, file_paths, bucket=bucket, max_workers=max_workers)
         logger.info(f"{bucket_dir_path} downloaded from S3")
         return True
     except ClientError as e:
         logger.error(f"Failed to download {bucket_dir_path}: {e}")
         return False
+
+
+def put_file(
+    file_path: str,
+    bucket_path: str,
+    *,
+    bucket: str = "gismart-analytics",
+    max_concurrency: int = TRANSFER_CONCURRENCY,
+) -> None:
+    """Upload file to S3 `bucket_path` by up to `max_concurrency` concurrent part requests"""
+    _client(max_concurrency).upload_file(
+        file_path, bucket, bucket_path, Config=_transfer_config(max_concurrency)
+    )
+
+
+def put_stream(
+    chunks: Iterable[bytes],
+    bucket_path: str,
+    *,
+    bucket: str = "gismart-analytics",
+    part_size: int = MULTIPART_PART_SIZE,
+    retries: int = 0,
+) -> None:
+    """Upload byte `chunks` to S3 `bucket_path` by multipart upload without buffering whole file"""
+    client = _client(DOWNLOAD_WORKERS, retries)
+    upload_id = client.create_multipart_upload(Bucket=bucket, Key=bucket_path)["UploadId"]
+    parts = []
+    buffer = bytearray()
+
+    def upload_part() -> None:
+        part_number = len(parts) + 1
+        response = client.upload_part(
+            Bucket=bucket,
+            Key=bucket_path,
+            UploadId=upload_id,
+            PartNumber=part_number,
+            Body=bytes(buffer),
+        )
+        parts.append({"ETag": response["ETag"], "PartNumber": part_number})
+        buffer.clear()
+
+    try:
+        for chunk in chunks:
+            buffer += chunk
+            if len(buffer) >= part_size:
+                upload_part()
+        if buffer or not parts:
+            upload_part()
+        client.complete_multipart_upload(
+            Bucket=bucket,
+            Key=bucket_path,
+            UploadId=upload_id,
+            MultipartUpload={"Parts": parts},
+        )
+    except BaseException:
+        client.abort_multipart_upload(Bucket=bucket, Key=bucket_path, UploadId=upload_id)
+        raise
+    logger.debug(f"{bucket_path} is uploaded to S3 in {len(parts)} parts")
+
+
+def get_file(
+    bucket_path: str,
+    file_path: str,
+    *,
+    bucket: str = "gismart-analytics",
+    retries: int = 0,
+) -> None:
+    """Download file from S3 `bucket_path` raising errors"""
+    _client(DOWNLOAD_WORKERS, retries).download_file(bucket, bucket_path, file_path)
+
+
+def download_files(
+    bucket_paths: Sequence[str],
+    dir_path: str,
+    *,
+    bucket: str = "gismart-analytics",
+    max_workers: Optional[int] = None,
+    retries: int = 0,
+) -> List[str]:
+    """
+    Download files from S3 to `dir_path` in parallel threads and return their local paths
+
+    Threads number is limited by files number and `max_workers`,
+    which is up to `DOWNLOAD_WORKERS` depending on CPU count by default
+    """
+    if not bucket_paths:
+        return []
+    os.makedirs(dir_path, exist_ok=True)
+    file_paths = [
+        os.path.join(dir_path, os.path.basename(bucket_path)) for bucket_path in bucket_paths
+    ]
+    _download(bucket_paths, file_paths, bucket=bucket, max_workers=max_workers, retries=retries)
+    logger.info(f"{len(file_paths)} files downloaded from S3")
+    return file_paths
+
+
+def delete_files(
+    bucket_paths: Sequence[str],
+    *,
+    bucket: str = "gismart-analytics",
+) -> None:
+    """Delete files from S3 in batches"""
+    client = _client()
+    for i in range(0, len(bucket_paths), DELETE_BATCH_SIZE):
+        batch = bucket_paths[i:i + DELETE_BATCH_SIZE]
+        client.delete_objects(
+            Bucket=bucket,
+            Delete={"Objects": [{"Key": bucket_path} for bucket_path in batch], "Quiet": True},
+        )
+    logger.debug(f"{len(bucket_paths)} files deleted from S3")
+
+
+def _download(
+    bucket_paths: Sequence[str],
+    file_paths: Sequence[str],
+    bucket: str = "gismart-analytics",
+    max_workers: Optional[int] = None,
+    retries: int = 0,
+) -> None:
+    if not bucket_paths:
+        return
+    workers = _workers(len(bucket_paths), max_workers)
+    client = _client(workers, retries)
+    with futures.ThreadPoolExecutor(workers) as executor:
+        downloads = [
+            executor.submit(client.download_file, bucket, bucket_path, file_path)
+            for bucket_path, file_path in zip(bucket_paths, file_paths)
+        ]
+        for download in downloads:
+            download.result()
+
+
+def _workers(count: int, max_workers: Optional[int] = None) -> int:
+    # Oversized pools are slower because of TLS handshakes competing for CPU
+    if max_workers is None:
+        max_workers = min(DOWNLOAD_WORKERS, 2 * (os.cpu_count() or 1))
+    return max(min(max_workers, count), 1)
+
+
+@functools.lru_cache(maxsize=8)
+def _transfer_config(max_concurrency: int = TRANSFER_CONCURRENCY) -> TransferConfig:
+    return TransferConfig(
+        multipart_threshold=TRANSFER_PART_SIZE,
+        multipart_chunksize=TRANSFER_PART_SIZE,
+        max_concurrency=max_concurrency,
+        use_threads=True,
+    )
+
+
+@functools.lru_cache(maxsize=8)
+def _client(workers: int = DOWNLOAD_WORKERS, retries: int = 0) -> BaseClient:
+    config = Config(
+        max_pool_connections=workers + 4,
+        retries={"max_attempts": max(retries, DEFAULT_RETRIES), "mode": "adaptive"},
+    )
+    # boto3 default session is not thread-safe
+    with client_lock:
+        return boto3.client("s3", config=config)
@@ -1,6 +1,9 @@
 import time
+import inspect
 import logging
-from typing import Callable, Sequence, Union
+import functools
+import threading
+from typing import Any, Callable, Dict, Hashable, Optional, Sequence, Tuple, Union
 
 
 logger = logging.getLogger(__name__)
@@ -32,3 +35,72 @@ def retry(
             return func(*args, **kwargs)
         return newfn
     return decorator
+
+
+def ttl_cache(
+    ttl: float,
+    *,
+    maxsize: Optional[int] = None,
+    refresh: bool = False,
+) -> Callable:
+    """
+    Cache the wrapped function results for `ttl` seconds keeping up to `maxsize` results.
+    If `refresh` is set, results older than half of `ttl` are returned
+    while they are reloaded in background. Use `cache_clear` to invalidate the cache
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+        cache: Dict[Hashable, Tuple[Any, float]] = {}
+        locks: Dict[Hashable, threading.Lock] = {}
+
+        def load(key, args, kwargs):
+            result = func(*args, **kwargs)
+            if maxsize and key not in cache and len(cache) >= maxsize:
+                evicted_key = next(iter(cache))
+                cache.pop(evicted_key, None)
+                locks.pop(evicted_key, None)
+            cache[key] = (result, time.monotonic())
+            return result
+
+        def reload(key, args, kwargs, lock):
+            try:
+                load(key, args, kwargs)
+            except Exception as e:
+                logger.warning(
+                    f"{e.__class__.__name__} thrown when trying to refresh {func.__name__}: {e}"
+                )
+            finally:
+                lock.release()
+
+        @functools.wraps(func)
+        def newfn(*args, **kwargs):
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            args, kwargs = bound.args, bound.kwargs
+            key = (args, tuple(sorted(kwargs.items())))
+            cached = cache.get(key)
+            if cached is not None:
+                result, loaded_at = cached
+                age = time.monotonic() - loaded_at
+                if age < ttl:
+                    if refresh and age > ttl / 2:
+                        lock = locks.setdefault(key, threading.Lock())
+                        if lock.acquire(blocking=False):
+                            thread = threading.Thread(
+                                target=reload, args=(key, args, kwargs, lock), daemon=True
+                            )
+                            thread.start()
+                    return result
+            with locks.setdefault(key, threading.Lock()):
+                cached = cache.get(key)
+                if cached is not None and time.monotonic() - cached[1] < ttl:
+                    return cached[0]
+                return load(key, args, kwargs)
+
+        def cache_clear():
+            cache.clear()
+            locks.clear()
+
+        newfn.cache_clear = cache_clear
+        return newfn
+    return decorator
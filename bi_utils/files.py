@@ -1,6 +1,16 @@
+import os
 import csv
+import gzip
+import uuid
+import contextlib
+import pandas as pd
+import pyarrow as pa
 import datetime as dt
-from typing import Sequence, Optional
+import pyarrow.csv as pacsv
+from typing import Iterator, Sequence, Optional
+
+
+CSV_CHUNK_ROWS = 100_000
 
 
 def data_filename(
@@ -16,8 +26,82 @@ def data_filename(
 
 
 def csv_columns(csv_path: str, *, separator: str = ",") -> Sequence[str]:
-    """Get column list from csv file"""
-    with open(csv_path) as file:
-        reader = csv.DictReader(file, delimiter=separator)
-        columns = reader.fieldnames or []
+    """Get column list from csv or gzipped csv file header"""
+    opener = gzip.open if csv_path.lower().endswith(".gz") else open
+    with opener(csv_path, "rt", newline="") as file:
+        columns = next(csv.reader(file, delimiter=separator), [])
     return columns
+
+
+def write_csv(
+    data: pd.DataFrame,
+    csv_path: str,
+    *,
+    columns: Optional[Sequence] = None,
+    separator: str = ",",
+) -> None:
+    """
+    Write data to csv or compressed csv file by `csv_chunks`
+
+    File is written to temporary file first and then replaces `csv_path`,
+    so it is never left half-written
+    """
+    # Temporary file keeps extension to detect compression by it and is created
+    # by the writer with default permissions unlike `tempfile.mkstemp`
+    root, extension = os.path.splitext(csv_path)
+    temp_path = f"{root}.{uuid.uuid4().hex}.tmp{extension}"
+    try:
+        with pa.output_stream(temp_path) as file:
+            for chunk in csv_chunks(data, columns=columns, separator=separator):
+                file.write(chunk)
+        os.replace(temp_path, csv_path)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.remove(temp_path)
+        raise
+
+
+def csv_chunks(
+    data: pd.DataFrame,
+    *,
+    columns: Optional[Sequence] = None,
+    separator: str = ",",
+    chunk_rows: int = CSV_CHUNK_ROWS,
+) -> Iterator[bytes]:
+    """
+    Yield data as csv by `chunk_rows` rows with header in the first chunk
+
+    Data is written by multithreaded arrow writer, data with objects unsupported by arrow
+    is written by pandas
+    """
+    try:
+        table = pa.Table.from_pandas(
+            data,
+            columns=list(columns) if columns else None,
+            preserve_index=False,
+        )
+        # Redshift timestamps have microsecond precision
+        schema = pa.schema(
+            field.with_type(pa.timestamp("us", tz=field.type.tz))
+            if pa.types.is_timestamp(field.type)
+            else field
+            for field in table.schema
+        )
+        table = table.cast(schema, safe=False)
+        first_chunk = _arrow_csv(table.slice(0, chunk_rows), separator, header=True)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        for start in range(0, max(len(data), 1), chunk_rows):
+            chunk = data.iloc[start:start + chunk_rows]
+            text = chunk.to_csv(columns=columns, index=False, header=start == 0, sep=separator)
+            yield text.encode()
+        return
+    yield first_chunk
+    for start in range(chunk_rows, table.num_rows, chunk_rows):
+        yield _arrow_csv(table.slice(start, chunk_rows), separator, header=False)
+
+
+def _arrow_csv(table: pa.Table, separator: str, header: bool) -> bytes:
+    sink = pa.BufferOutputStream()
+    write_options = pacsv.WriteOptions(include_header=header, delimiter=separator)
+    pacsv.write_csv(table, sink, write_options=write_options)
+    return sink.getvalue().to_pybytes()
@@ -1,8 +1,10 @@
 import logging
+import numpy as np
 import pandas as pd
-from typing import Dict, Hashable, Optional, Sequence, Tuple, Union
+from typing import Callable, Dict, Hashable, Optional, Sequence, Tuple, Union
 
 
+ANALYZER_SAMPLE_ROWS = 128
 logger = logging.getLogger(__name__)
 
 
@@ -37,16 +39,14 @@ def df_test(
     failcount = 0
     if df.empty:
         raise ValueError("The dataframe is empty")
-    cols = df.columns
-
     if nullable_cols is None:
         nullable_cols = []
-    not_nullable_cols = [c for c in cols if c not in nullable_cols]
-    nans = df[not_nullable_cols].isna().sum()
-    message = f"Found NA in columns:\n{nans[nans > 0].to_string()}"
+    not_nullable_cols = df.columns.difference(nullable_cols, sort=False)
+    # Counting values doesn't build boolean frame of NAs
+    nans = len(df) - df[not_nullable_cols].count()
     failcount += _passert(
         nans.sum() == 0,
-        message,
+        lambda: f"Found NA in columns:\n{nans[nans > 0].to_string()}",
     )
 
     failcount += thresholds_test(df, thresholds, ai=ai)
@@ -64,16 +64,22 @@ def thresholds_test(
     ai: bool = True,
 ) -> int:
     failcount = 0
-    if thresholds is None:
-        thresholds = {}
+    if not thresholds:
+        return failcount
     for col, (min_threshold, max_threshold) in thresholds.items():
+        values = df[col]
+        # Numpy numeric columns are compared as arrays of their own dtype without series overhead
+        if isinstance(values.dtype, np.dtype) and values.dtype.kind in "biuf":
+            values = values.to_numpy()
         failcount += _check(
-            violations=df[df[col] < min_threshold],
+            df,
+            violated=_to_mask(values < min_threshold),
             condition_message=f"{col} is below {min_threshold}",
             ai=ai,
         )
         failcount += _check(
-            violations=df[df[col] > max_threshold],
+            df,
+            violated=_to_mask(values > max_threshold),
             condition_message=f"{col} is above {max_threshold}",
             ai=ai,
         )
@@ -86,15 +92,24 @@ def quantile_test(
     ai: bool = True,
 ) -> int:
     failcount = 0
-    if max_quantiles is None:
-        max_quantiles = {}
-    for col, (quantile, max_multiplier) in max_quantiles.items():
-        q_threshold = df[col].quantile(quantile) * max_multiplier
+    if not max_quantiles:
+        return failcount
+    # Columns are extracted once as one numpy array instead of per column series
+    values = df[list(max_quantiles)].to_numpy(dtype=float, na_value=np.nan)
+    for i, (col, (quantile, max_multiplier)) in enumerate(max_quantiles.items()):
+        q_value, upper_tail = _quantile(values[:, i], quantile)
+        q_threshold = q_value * max_multiplier
         if q_threshold <= 0:
             logger.warning(f"Skipping {col} max_quantiles because threshold <= 0")
             continue
+        # Values above the quantile's upper neighbour are all in the partitioned tail,
+        # so the full column is scanned only when it's known to have violations
+        if upper_tail.size and q_threshold >= upper_tail[0]:
+            if not np.count_nonzero(upper_tail > q_threshold):
+                continue
         failcount += _check(
-            violations=df[df[col] > q_threshold],
+            df,
+            violated=values[:, i] > q_threshold,
             condition_message=f"{col} is above {q_threshold}",
             ai=ai,
         )
@@ -111,7 +126,8 @@ def query_test(
         verify_queries = []
     for q in verify_queries:
         failcount += _check(
-            violations=df.query(q),
+            df,
+            violated=_to_mask(df.eval(q)),
             condition_message=q,
             ai=ai,
         )
@@ -120,14 +136,24 @@ def query_test(
 
 def unique_index_test(
     df: pd.DataFrame,
-    unique_index: Optional[Sequence[Hashable]],
+    unique_index: Optional[Union[Hashable, Sequence[Hashable]]],
 ) -> int:
     failcount = 0
     if unique_index is not None:
-        n_dups = df.duplicated(subset=unique_index, keep="first").sum()
+        # Single column name is accepted like by `df.duplicated(subset=...)`
+        if pd.api.types.is_list_like(unique_index):
+            unique_index = list(unique_index)
+        else:
+            unique_index = [unique_index]
+        # Duplicates are counted from the number of distinct keys without building a mask
+        if len(unique_index) == 1:
+            n_unique = df[unique_index[0]].nunique(dropna=False)
+        else:
+            n_unique = df.groupby(unique_index, sort=False, dropna=False, observed=True).ngroups
+        n_dups = len(df) - n_unique
         failcount += _passert(
             n_dups == 0,
-            f"Found {n_dups} duplicates for index {unique_index}",
+            lambda: f"Found {n_dups} duplicates for index {unique_index}",
         )
     return failcount
 
@@ -140,8 +166,10 @@ def find_common_features(
     if incompliant_rows.shape[0] > min_rows:
         cols = cols or incompliant_rows.columns
         incompliant_rows = incompliant_rows[cols]
-        nunique = incompliant_rows.nunique()
-        common_cols = list(nunique[nunique == 1].index)
+        # Columns varying in sample rows can't be common, so only the rest are checked fully
+        sample_nunique = incompliant_rows.head(ANALYZER_SAMPLE_ROWS).nunique()
+        candidate_cols = sample_nunique[sample_nunique <= 1].index
+        common_cols = [col for col in candidate_cols if _is_constant(incompliant_rows[col])]
         if len(common_cols) > 0:
             common_cols_values = incompliant_rows.head(1)[common_cols]
             logger.warning(
@@ -152,24 +180,60 @@ def find_common_features(
             logger.warning("Analyzer: no pattern detected")
 
 
+def _is_constant(values: pd.Series) -> bool:
+    """Check whether non-NA `values` are all equal to the first one like `nunique() == 1`"""
+    # Equality scan of numpy array is cheaper than hashing all values to count unique ones
+    values = values.dropna().to_numpy()
+    return values.size > 0 and bool((values == values[0]).all())
+
+
+def _quantile(values: np.ndarray, quantile: float) -> Tuple[float, np.ndarray]:
+    """
+    Get linearly interpolated `quantile` of `values` skipping NaNs like pandas and partitioned
+    values starting from the quantile's upper neighbour, which are not less than the others
+    """
+    values = values[~np.isnan(values)]
+    if not values.size:
+        return np.nan, values
+    # Only two order statistics are needed, so they are selected in linear time without sorting
+    position = quantile * (values.size - 1)
+    lower = int(np.floor(position))
+    upper = min(lower + 1, values.size - 1)
+    partitioned = np.partition(values, [lower, upper])
+    lower_value, upper_value = partitioned[lower], partitioned[upper]
+    q_value = float(lower_value + (upper_value - lower_value) * (position - lower))
+    return q_value, partitioned[upper:]
+
+
+def _to_mask(violated: Union[np.ndarray, pd.Series]) -> np.ndarray:
+    # Comparisons with NA don't violate conditions
+    if isinstance(violated, pd.Series):
+        return violated.to_numpy(dtype=bool, na_value=False)
+    return violated
+
+
 def _check(
-    violations: pd.DataFrame,
+    df: pd.DataFrame,
+    violated: np.ndarray,
     condition_message: str,
     cols: Optional[list] = None,
     ai: bool = True,
 ) -> int:
-    n_violations = violations.shape[0]
+    # Violating rows are selected only to be analyzed, otherwise they are just counted
+    n_violations = int(np.count_nonzero(violated))
     failcount = _passert(
         n_violations == 0,
-        f"Found {n_violations} rows where {condition_message}",
+        lambda: f"Found {n_violations} rows where {condition_message}",
     )
     if failcount > 0 and ai:
-        find_common_features(incompliant_rows=violations, cols=cols)
+        find_common_features(incompliant_rows=df[violated], cols=cols)
     return failcount
 
 
-def _passert(passed: bool, message: str) -> int:
+def _passert(passed: bool, message: Union[str, Callable[[], str]]) -> int:
+    # Message may be passed as callable to be formatted only on failure
     if passed:
         return 0
-    logger.warning(message)
+    if logger.isEnabledFor(logging.WARNING):
+        logger.warning(message() if callable(message) else message)
     return 1
@@ -3,14 +3,18 @@ from __future__ import annotations
 import os
 import logging
 import pandas as pd
+import pyarrow as pa
 import dataclasses as dc
 import multiprocessing as mp
-from typing import Any, Dict, Optional, Sequence, Type
+from multiprocessing import shared_memory
+from typing import Any, Dict, Optional, Sequence, Set, Type
 from types import TracebackType
 
-from . import aws
+from . import aws, files
 
 
+# Redshift doesn't support COPY FROM STDIN, so data is inserted by bounded multi-row statements
+INSERT_CHUNK_ROWS = 1000
 logger = logging.getLogger(__name__)
 
 
@@ -34,6 +38,8 @@ class QueueExporter:
         self._close_signal = "close"
         self._process_name = process_name
         self._alive = True
+        # Shared memory of queued dataframes is released by parent if worker doesn't load it
+        self._shm_names: Set[str] = set()
         self._process = mp.Process(target=self._worker, name=process_name)
         self._process.start()
 
@@ -58,9 +64,20 @@ class QueueExporter:
         self._queue.put(item)
         self._queue.close()
         self._alive = False
+        if not self._process.is_alive():
+            self._release_shared()
 
     def join(self) -> None:
         self._process.join()
+        self._release_shared()
+
+    def terminate(self) -> None:
+        """Stop worker process without exporting queued items"""
+        self._process.terminate()
+        self._process.join()
+        self._queue.close()
+        self._alive = False
+        self._release_shared()
 
     def export_df(
         self,
@@ -92,8 +109,13 @@ class QueueExporter:
             file_path, s3_bucket, s3_bucket_dir, schema, table, delete_s3_after, delete_file_after
         )
         self._check_process()
+        # Data is passed to worker process in shared memory instead of pickling it through queue
+        shm_name = _share_df(df)
+        if shm_name:
+            self._shm_names.add(shm_name)
         kwargs = {
-            "df": df,
+            "df": None if shm_name else df,
+            "shm_name": shm_name,
             "file_path": file_path,
             "separator": separator,
             "columns": columns,
@@ -149,9 +171,10 @@ class QueueExporter:
 
     def _export_df(
         self,
-        df: pd.DataFrame,
+        df: Optional[pd.DataFrame],
         file_path: str,
         *,
+        shm_name: Optional[str] = None,
         separator: str = ",",
         columns: Optional[Sequence] = None,
         s3_bucket: Optional[str] = None,
@@ -164,11 +187,13 @@ class QueueExporter:
         secret_id: str = aws.connection.DEFAULT_SECRET_ID,
     ) -> None:
         filename = os.path.basename(file_path)
+        if shm_name:
+            df = _load_shared_df(shm_name)
         if columns:
             df = df[columns]
         if s3_bucket or s3_bucket_dir or not delete_file_after:
             if ".csv" in file_path.lower():
-                df.to_csv(file_path, index=False)
+                files.write_csv(df, file_path, separator=separator)
                 if partition_cols:
                     logger.warning(f"Partitions are not supported for csv files: {filename}")
             elif ".parquet" in file_path.lower() or partition_cols:
@@ -204,6 +229,7 @@ class QueueExporter:
                     index=False,
                     if_exists="append",
                     method="multi",
+                    chunksize=INSERT_CHUNK_ROWS,
                 )
 
     def _export_file(
@@ -274,8 +300,59 @@ class QueueExporter:
         ):
             raise ValueError("Only csv or parquet files can be exported to DB via S3")
 
+    def _release_shared(self) -> None:
+        while self._shm_names:
+            _unlink_shared(self._shm_names.pop())
+
     def _check_process(self) -> None:
         if not self._process.is_alive():
             raise ValueError(f"Process {self._process_name} is closed")
         if not self._alive:
             raise ValueError("Queue is closed")
+
+
+def _share_df(df: pd.DataFrame) -> Optional[str]:
+    """Write dataframe to shared memory as arrow stream and get its name"""
+    try:
+        table = pa.Table.from_pandas(df)
+    except (ValueError, pa.ArrowTypeError, pa.ArrowNotImplementedError):
+        # Objects and frames unsupported by arrow, f.e. with duplicate columns, are pickled
+        return None
+    mock_stream = pa.MockOutputStream()
+    _write_table(table, mock_stream)
+    shm = shared_memory.SharedMemory(create=True, size=max(mock_stream.size(), 1))
+    _write_table(table, pa.FixedSizeBufferWriter(pa.py_buffer(shm.buf)))
+    shm.close()
+    return shm.name
+
+
+def _load_shared_df(shm_name: str) -> pd.DataFrame:
+    """Read dataframe from shared memory and release it"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        # Stream is copied out, so memory isn't kept mapped by zero-copy data of the frame
+        buffer = pa.py_buffer(shm.buf.tobytes())
+    finally:
+        shm.close()
+        shm.unlink()
+    return _read_df(buffer)
+
+
+def _unlink_shared(shm_name: str) -> None:
+    try:
+        shm = shared_memory.SharedMemory(name=shm_name)
+    except FileNotFoundError:
+        # Already loaded and released by worker
+        return
+    shm.close()
+    shm.unlink()
+
+
+def _write_table(table: pa.Table, stream: pa.NativeFile) -> None:
+    with pa.ipc.new_stream(stream, table.schema) as writer:
+        writer.write_table(table)
+
+
+def _read_df(buffer: pa.Buffer) -> pd.DataFrame:
+    with pa.ipc.open_stream(buffer) as reader:
+        return reader.read_pandas()
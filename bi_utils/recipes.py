@@ -1,9 +1,15 @@
 def dict_merge(receiver: dict, updater: dict) -> dict:
     """Update receiver dict with updater dict's values recursively"""
-    receiver = receiver.copy()
-    for k in updater:
-        if (k in receiver and isinstance(receiver[k], dict) and isinstance(updater[k], dict)):
-            receiver[k] = dict_merge(receiver[k], updater[k])
-        else:
-            receiver[k] = updater[k]
-    return receiver
+    merged = receiver.copy()
+    # Nested dicts are merged iteratively, each of them is copied once
+    stack = [(merged, updater)]
+    while stack:
+        receiver, updater = stack.pop()
+        for k, value in updater.items():
+            receiver_value = receiver.get(k)
+            if isinstance(receiver_value, dict) and isinstance(value, dict):
+                receiver[k] = receiver_value.copy()
+                stack.append((receiver[k], value))
+            else:
+                receiver[k] = value
+    return merged
@@ -1,9 +1,14 @@
-from typing import Any
+import os
+import functools
+from typing import Any, Sequence, Tuple
 
 
 def get_query(sql_path: str, *args: Any, **kwargs: Any) -> str:
     """Read query from file and insert params"""
-    query_template = open(sql_path).read()
+    mtime_ns = os.stat(sql_path).st_mtime_ns
+    if not args and not kwargs:
+        return _format_template(sql_path, mtime_ns)
+    query_template = _read_template(sql_path, mtime_ns)
     query = query_template.format(*args, **kwargs)
     return query
 
@@ -14,18 +19,15 @@ def build_set(**equal_conditions: Any) -> str:
     """
     if not equal_conditions:
         raise ValueError("Pass at least 1 equal condition as keyword argument")
-    set_str = "SET "
-    for i, (column, value) in enumerate(equal_conditions.items()):
-        if i > 0:
-            set_str += ", "
+    set_items = []
+    for column, value in equal_conditions.items():
         if value is None:
-            set_str += f"{column} = NULL"
+            set_items.append(f"{column} = NULL")
+        elif isinstance(value, (int, float)):
+            set_items.append(f"{column} = {value}")
         else:
-            if isinstance(value, (int, float)):
-                set_str += f"{column} = {value}"
-            else:
-                set_str += f"{column} = '{value}'"
-    return set_str
+            set_items.append(f"{column} = '{value}'")
+    return "SET " + ", ".join(set_items)
 
 
 def build_where(**conditions: Any) -> str:
@@ -38,18 +40,79 @@ def build_where(**conditions: Any) -> str:
     """
     if not conditions:
         return "WHERE 1 = 1"
-    where_str = "WHERE "
-    for i, (column, value) in enumerate(conditions.items()):
-        if i > 0:
-            where_str += " AND "
-        if value is None:
-            where_str += f"{column} IS NULL"
-        else:
-            if isinstance(value, (int, float)):
-                where_str += f"{column} = {value}"
-            elif isinstance(value, (list, tuple)):
-                in_str = ", ".join([f"'{v}'" if isinstance(v, str) else str(v) for v in value])
-                where_str += f"{column} IN ({in_str})"
-            else:
-                where_str += f"{column} = '{value}'"
-    return where_str
+    where_items = [_where_item(value, column) for column, value in conditions.items()]
+    return "WHERE " + " AND ".join(where_items)
+
+
+def build_where_params(**conditions: Any) -> Tuple[str, tuple]:
+    """
+    Build WHERE statement with `%s` placeholders and its params for `cursor.execute`
+
+    Conditions are the same as in `build_where`, but values are bound by the driver
+    instead of being formatted into the statement, so statements are cached by their shape
+    """
+    if not conditions:
+        return "WHERE 1 = 1", ()
+    shape = tuple((column, _where_kind(value)) for column, value in conditions.items())
+    params = tuple(_where_param(value) for value in conditions.values() if value is not None)
+    return _where_template(shape), params
+
+
+# Condition formatter is looked up by value type once and cached instead of isinstance checks
+@functools.singledispatch
+def _where_item(value: Any, column: str) -> str:
+    return f"{column} = '{value}'"
+
+
+@_where_item.register(type(None))
+def _(value: None, column: str) -> str:
+    return f"{column} IS NULL"
+
+
+@_where_item.register(int)
+@_where_item.register(float)
+def _(value: float, column: str) -> str:
+    return f"{column} = {value}"
+
+
+@_where_item.register(list)
+@_where_item.register(tuple)
+def _(value: Sequence, column: str) -> str:
+    in_str = ", ".join([f"'{v}'" if isinstance(v, str) else str(v) for v in value])
+    return f"{column} IN ({in_str})"
+
+
+@functools.lru_cache(maxsize=128)
+def _read_template(sql_path: str, mtime_ns: int) -> str:
+    # Modification time is a part of cache key to reread changed files
+    with open(sql_path, encoding="utf-8") as file:
+        return file.read()
+
+
+@functools.lru_cache(maxsize=128)
+def _format_template(sql_path: str, mtime_ns: int) -> str:
+    # Query without params is the same for each call, so it's formatted once
+    return _read_template(sql_path, mtime_ns).format()
+
+
+@functools.lru_cache(maxsize=256)
+def _where_template(shape: Tuple[Tuple[str, str], ...]) -> str:
+    templates = {"null": "{} IS NULL", "in": "{} IN %s", "value": "{} = %s"}
+    return "WHERE " + " AND ".join(templates[kind].format(column) for column, kind in shape)
+
+
+def _where_kind(value: Any) -> str:
+    if value is None:
+        return "null"
+    if isinstance(value, (list, tuple)):
+        return "in"
+    return "value"
+
+
+def _where_param(value: Any) -> Any:
+    # Values are bound like build_where formats them, other types are passed as strings
+    if isinstance(value, (list, tuple)):
+        return tuple(_where_param(v) for v in value)
+    if isinstance(value, (str, int, float)):
+        return value
+    return str(value)
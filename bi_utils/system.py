@@ -1,7 +1,10 @@
 import os
 import shutil
+import signal
 import psutil
-from typing import Dict, Optional
+import functools
+import threading
+from typing import Any, Dict, Optional
 
 
 UNITS_MAPPING = {
@@ -12,18 +15,20 @@ UNITS_MAPPING = {
     "KB": 1 << 10,
     "B": 1,
 }
+# Default units ordered by power of 1024
+UNITS = tuple(reversed(UNITS_MAPPING))
 
 
 def fill_message(message: str, /, char: str = "=", *, prefix_width: int = 0) -> str:
     """Center message for terminal and fill it by `char`"""
-    width = max(shutil.get_terminal_size().columns - prefix_width, 0)
+    width = max(_terminal_width() - prefix_width, 0)
     filled_message = f" {message} ".center(width, char)
     return filled_message
 
 
 def ram_usage() -> str:
     """Get current process physical memory usage"""
-    process = psutil.Process(os.getpid())
+    process = _process(os.getpid())
     ram = verbose_size(process.memory_info().rss)
     return ram
 
@@ -31,13 +36,42 @@ def ram_usage() -> str:
 def verbose_size(size_bytes: int, /, units: Optional[Dict[str, int]] = None) -> str:
     """Convert size in bytes to readable units"""
     if units is None:
-        units = UNITS_MAPPING
-    suffix, factor = "", 1
-    for suffix, factor in units.items():
-        if size_bytes >= factor:
-            break
+        # Power of 1024 of default units is derived from the number of bits
+        power = 0
+        if size_bytes >= 1:
+            power = min((int(size_bytes).bit_length() - 1) // 10, len(UNITS) - 1)
+        suffix, factor = UNITS[power], 1 << (power * 10)
+    else:
+        suffix, factor = "", 1
+        for suffix, factor in units.items():
+            if size_bytes >= factor:
+                break
     if factor == 1:
         amount = int(size_bytes / factor)
     else:
         amount = round(size_bytes / factor, 2)
     return f"{amount}{suffix}"
+
+
+@functools.lru_cache(maxsize=1)
+def _process(pid: int) -> psutil.Process:
+    # Process is keyed by pid to get a new one in forked processes
+    return psutil.Process(pid)
+
+
+@functools.lru_cache(maxsize=1)
+def _terminal_width() -> int:
+    # Terminal size is cached and reset on SIGWINCH instead of querying it for each message
+    return shutil.get_terminal_size().columns
+
+
+def _reset_terminal_width(signum: int, frame: Any) -> None:
+    _terminal_width.cache_clear()
+    if callable(_previous_sigwinch_handler):
+        _previous_sigwinch_handler(signum, frame)
+
+
+_previous_sigwinch_handler = None
+# Signal handlers can be set only in main thread, previous handler is still called on resize
+if hasattr(signal, "SIGWINCH") and threading.current_thread() is threading.main_thread():
+    _previous_sigwinch_handler = signal.signal(signal.SIGWINCH, _reset_terminal_width)
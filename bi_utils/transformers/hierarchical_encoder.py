@@ -3,12 +3,16 @@ from __future__ import annotations
 import logging
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
 from sklearn.base import BaseEstimator, TransformerMixin
 from sklearn.utils.validation import check_is_fitted
 from typing import Optional, Sequence, Union
 
 
 logger = logging.getLogger(__name__)
+# Arrow backed strings are available since pandas 1.2
+ArrowStringArray = getattr(pd.arrays, "ArrowStringArray", None)
 
 
 class HierarchicalEncoder(BaseEstimator, TransformerMixin):
@@ -21,12 +25,14 @@ class HierarchicalEncoder(BaseEstimator, TransformerMixin):
         C: int = 30,
         disambiguate: bool = True,
         verbose: bool = False,
+        dtype: type = np.float64,
     ) -> None:
         self.C = C
         self.cols = cols
         self.sample_weight_col = sample_weight_col
         self.disambiguate = disambiguate
         self.verbose = verbose
+        self.dtype = dtype
 
     def _check_params(self, X: pd.DataFrame) -> None:
         if self.C <= 0:
@@ -44,9 +50,18 @@ class HierarchicalEncoder(BaseEstimator, TransformerMixin):
 
         `sep` is used as a value separator in the concatenated values.
         """
-        for i, col in enumerate(self.cols):
-            if i > 0:
-                X[col] = X[col].astype("str") + sep + X[self.cols[i - 1]].astype("str")
+        if ArrowStringArray is None:
+            parent = X[self.cols[0]].astype("str")
+            for col in self.cols[1:]:
+                parent = X[col].astype("str").str.cat(parent, sep=sep)
+                X[col] = parent
+            return X
+        # Each column is cast to string once and joined with its parent in arrow string buffers
+        parent = pa.array(X[self.cols[0]].astype("str"), type=pa.string())
+        for col in self.cols[1:]:
+            values = pa.array(X[col].astype("str"), type=pa.string())
+            parent = pc.binary_join_element_wise(values, parent, sep)
+            X[col] = pd.Series(ArrowStringArray(parent), index=X.index)
         return X
 
     def _reset_dead_level(self, lvl: int) -> None:
@@ -55,23 +70,24 @@ class HierarchicalEncoder(BaseEstimator, TransformerMixin):
         reset the level's ratio to the parent's one
         (to avoid chain-effect overfitting in one-of-a-kind case)
         """
+        groups = self.lvl_groups_[lvl]
         dead_level_mask = (
-            self.lvl_groups_[lvl]["target_denominator"]
-            == self.lvl_groups_[lvl]["parent_denominator"]
+            groups["target_denominator"].to_numpy() == groups["parent_denominator"].to_numpy()
         )
-        self.lvl_groups_[lvl].loc[dead_level_mask, "ratio"] = self.lvl_groups_[lvl].loc[
-            dead_level_mask, "parent_ratio"
-        ]
+        if dead_level_mask.any():
+            ratio = groups["ratio"].to_numpy(dtype=float, copy=True)
+            np.copyto(ratio, groups["parent_ratio"].to_numpy(dtype=float), where=dead_level_mask)
+            groups["ratio"] = ratio
 
     def fit(self, X: pd.DataFrame, y: Union[pd.Series, np.ndarray]) -> HierarchicalEncoder:
         if self.cols is None:
             self.cols = [c for c in X.columns if not c == self.sample_weight_col]
-        if self.sample_weight_col is None:
-            sample_weight = pd.Series(1, index=X.index)
-        else:
+        # Unweighted targets are summed and counted without an array of unit weights
+        sample_weight = None
+        if self.sample_weight_col is not None:
             sample_weight = X[self.sample_weight_col]
-        X = X[self.cols].copy()
-        y = y.copy()
+        # New frame references the columns without copying them
+        X = pd.DataFrame({col: X[col] for col in self.cols}, copy=False)
         if isinstance(y, pd.Series):
             y = y.values
         self._validate_data(X, y, dtype=None, y_numeric=True)
@@ -82,8 +98,8 @@ class HierarchicalEncoder(BaseEstimator, TransformerMixin):
         if self.disambiguate:
             X = self._disambiguate(X)
 
-        X["target_denominator"] = sample_weight
-        X["target_numerator"] = y * sample_weight
+        weights = None if sample_weight is None else sample_weight.to_numpy(dtype=float)
+        numerators = y if weights is None else y * weights
 
         self.total_ratio_ = np.average(y, weights=sample_weight)
         min_sample_std = np.sqrt(self.total_ratio_ * (1 - self.total_ratio_) / self.C)
@@ -92,36 +108,50 @@ class HierarchicalEncoder(BaseEstimator, TransformerMixin):
             logger.info(f"STD/AVG for min sample: {self.std_mean_ratio_}")
 
         self.lvl_groups_ = {}
-        for lvl, _ in enumerate(self.cols):
-            self.lvl_groups_[lvl] = (
-                X.groupby(self.cols[: lvl + 1])[["target_numerator", "target_denominator"]]
-                .sum()
-                .reset_index()
+        self.lvl_categories_ = {}
+        self.lvl_ratios_ = {}
+        group_ids = np.zeros(len(X), dtype=np.int64)
+        for lvl, col in enumerate(self.cols):
+            # Each column is factorized once and combined with parent group ids,
+            # so groups are numbered by appearance and summed without hashing all levels
+            codes, uniques = pd.factorize(X[col], sort=False)
+            parent_ids = group_ids
+            group_ids = pd.factorize(parent_ids * len(uniques) + codes, sort=False)[0]
+            n_groups = group_ids.max() + 1
+            first_rows = np.flatnonzero(np.diff(np.maximum.accumulate(group_ids), prepend=-1))
+            self.lvl_groups_[lvl] = X.iloc[first_rows, : lvl + 1].reset_index(drop=True)
+            self.lvl_groups_[lvl]["target_numerator"] = np.bincount(
+                group_ids, weights=numerators, minlength=n_groups
+            )
+            self.lvl_groups_[lvl]["target_denominator"] = np.bincount(
+                group_ids, weights=weights, minlength=n_groups
             )
             if lvl == 0:
                 self.lvl_groups_[lvl]["parent_ratio"] = self.total_ratio_
                 self.lvl_groups_[lvl]["parent_denominator"] = -1
             else:
-                parent_col = self.cols[lvl - 1]
                 parent_groups = self.lvl_groups_[lvl - 1]
-                parent_ratio = parent_groups.set_index(parent_col)["ratio"]
-                self.lvl_groups_[lvl]["parent_ratio"] = self.lvl_groups_[lvl][parent_col].map(
-                    parent_ratio
-                )
-                parent_denominator = parent_groups.set_index(parent_col)["target_denominator"]
-                self.lvl_groups_[lvl]["parent_denominator"] = self.lvl_groups_[lvl][parent_col].map(
-                    parent_denominator
-                )
-            self.lvl_groups_[lvl]["ratio"] = (
-                self.lvl_groups_[lvl]["target_numerator"]
-                + self.lvl_groups_[lvl]["parent_ratio"] * self.C
-            ) / (self.lvl_groups_[lvl]["target_denominator"] + self.C)
+                # Parent groups are ordered by their ids, so they're taken by ids of first rows
+                parents = parent_ids[first_rows]
+                self.lvl_groups_[lvl]["parent_ratio"] = parent_groups["ratio"].to_numpy()[parents]
+                self.lvl_groups_[lvl]["parent_denominator"] = parent_groups[
+                    "target_denominator"
+                ].to_numpy()[parents]
+            numerator = self.lvl_groups_[lvl]["target_numerator"].to_numpy(dtype=float)
+            denominator = self.lvl_groups_[lvl]["target_denominator"].to_numpy(dtype=float)
+            parent_ratio = self.lvl_groups_[lvl]["parent_ratio"].to_numpy(dtype=float)
+            self.lvl_groups_[lvl]["ratio"] = (numerator + parent_ratio * self.C) / (
+                denominator + self.C
+            )
             self._reset_dead_level(lvl=lvl)
+            # Level categories are indexed once to map values by their positions in transform
+            self.lvl_categories_[lvl] = pd.Index(self.lvl_groups_[lvl][self.cols[lvl]])
+            self.lvl_ratios_[lvl] = self.lvl_groups_[lvl]["ratio"].to_numpy(dtype=self.dtype)
         return self
 
     def transform(self, X: pd.DataFrame) -> np.ndarray:
         check_is_fitted(self)
-        X = X[self.cols].copy()
+        X = pd.DataFrame({col: X[col] for col in self.cols}, copy=False)
         self._validate_data(X, dtype=None)
 
         if self.verbose:
@@ -129,26 +159,27 @@ class HierarchicalEncoder(BaseEstimator, TransformerMixin):
         if self.disambiguate:
             X = self._disambiguate(X)
         expected_len = X.shape[0]
-        self.result_ = pd.Series(index=X.index, dtype=float)
+        self.result_ = np.full(expected_len, self.total_ratio_, dtype=self.dtype)
+        # Only rows unknown to deeper levels are looked up in parent levels
+        missing = np.arange(expected_len)
         for lvl in reversed(range(len(self.cols))):
             if self.verbose:
                 logger.info(f"Mapping {self.cols[lvl]}...")
-            bavg = (
-                self.lvl_groups_[lvl]
-                .reset_index()[[self.cols[lvl], "ratio"]]
-                .set_index(self.cols[lvl])["ratio"]
-            )
-            mapping = X[self.cols[lvl]].map(bavg)
-            self.result_ = self.result_.fillna(mapping)
-            n_na = self.result_.isna().sum()
+            values = X[self.cols[lvl]]
+            if missing.size < expected_len:
+                values = values.iloc[missing]
+            # Ratios are gathered by category positions instead of hashing values into a Series
+            codes = self.lvl_categories_[lvl].get_indexer(values)
+            mapped = codes >= 0
+            self.result_[missing[mapped]] = self.lvl_ratios_[lvl][codes[mapped]]
+            missing = missing[~mapped]
+            n_na = missing.size
             if self.verbose:
                 logger.info(f"Mapping completed, missing values to fill: {n_na}/{expected_len}")
             if n_na == 0:
                 break
-        n_na = self.result_.isna().sum()
-        if n_na > 0 and self.verbose:
-            logger.info(f"Imputing {n_na} unknown values with global average...")
-        self.result_ = self.result_.fillna(self.total_ratio_)
+        if missing.size > 0 and self.verbose:
+            logger.info(f"Imputing {missing.size} unknown values with global average...")
         if self.verbose:
             logger.info("Completed.")
-        return self.result_.values
+        return self.result_
@@ -41,8 +41,7 @@ class QuantileClipper(BaseEstimator, TransformerMixin):
     def fit(self, X: pd.DataFrame, y: Union[pd.Series, np.ndarray]) -> QuantileClipper:
         if self.cols is None:
             self.cols = list(X.columns)
-        X = X[self.cols].copy()
-        y = y.copy()
+        X = pd.DataFrame({col: X[col] for col in self.cols}, copy=False)
         if isinstance(y, pd.Series):
             y = y.values
         self._validate_data(X, y, dtype=None, y_numeric=True)
@@ -50,31 +49,33 @@ class QuantileClipper(BaseEstimator, TransformerMixin):
 
         X["target"] = y
         groups = X.groupby(self.cols, observed=True)
-        self.groups_u_ = groups["target"].quantile(self.uq, **self.quantile_params)
-        self.groups_u_ = self.groups_u_.fillna(y.max()).rename("target_u")
-        self.groups_l_ = groups["target"].quantile(self.lq, **self.quantile_params)
-        self.groups_l_ = self.groups_l_.fillna(y.min()).rename("target_l")
+        # Both quantiles are computed in one call, so groups are sorted once
+        quantiles = list(dict.fromkeys([self.lq, self.uq]))
+        bounds = groups["target"].quantile(quantiles, **self.quantile_params).unstack()
+        self.groups_u_ = bounds[self.uq].fillna(y.max()).rename("target_u")
+        self.groups_l_ = bounds[self.lq].fillna(y.min()).rename("target_l")
         self.n_groups_ = len(groups)
         return self
 
     def transform(self, X: pd.DataFrame, y: Union[pd.Series, np.ndarray]) -> np.ndarray:
         check_is_fitted(self)
-        X = X[self.cols].copy()
-        y = y.copy()
+        X = X[self.cols]
         if isinstance(y, pd.Series):
             y = y.values
         self._validate_data(X, y, dtype=None, y_numeric=True)
 
-        X["target"] = y
-        X = X.set_index(self.cols)
-        X = X.join(self.groups_l_, how="left")
-        X = X.join(self.groups_u_, how="left")
-        X["target_l"] = X["target_l"].fillna(y.min())
-        X["target_u"] = X["target_u"].fillna(y.max())
-        X["modified_target"] = X["target"].clip(X["target_l"], X["target_u"])
+        # Group bounds are taken by group positions instead of joining frames on their index
+        if len(self.cols) > 1:
+            keys = pd.MultiIndex.from_frame(X)
+        else:
+            keys = pd.Index(X[self.cols[0]])
+        positions = self.groups_l_.index.get_indexer(keys)
+        known = positions >= 0
+        target_l = np.where(known, self.groups_l_.to_numpy()[positions], y.min())
+        target_u = np.where(known, self.groups_u_.to_numpy()[positions], y.max())
 
-        assert ~(X["target_l"] > X["target_u"]).any()
-        return X["modified_target"].values
+        assert not (target_l > target_u).any()
+        return np.clip(y, target_l, target_u)
 
     def fit_transform(self, X: pd.DataFrame, y: Union[pd.Series, np.ndarray]) -> np.ndarray:
         return self.fit(X, y).transform(X, y)
@@ -20,11 +20,13 @@ class TargetEncoder(BaseEstimator, TransformerMixin):
         sample_weight_col: Optional[str] = None,
         C: int = 30,
         verbose: bool = False,
+        dtype: type = np.float64,
     ) -> None:
         self.C = C
         self.cols = cols
         self.sample_weight_col = sample_weight_col
         self.verbose = verbose
+        self.dtype = dtype
 
     def _check_params(self, X: pd.DataFrame) -> None:
         if self.C <= 1:
@@ -33,12 +35,10 @@ class TargetEncoder(BaseEstimator, TransformerMixin):
     def fit(self, X: pd.DataFrame, y: Union[pd.Series, np.ndarray]) -> TargetEncoder:
         if self.cols is None:
             self.cols = [c for c in list(X.columns) if not c == self.sample_weight_col]
-        if self.sample_weight_col is None:
-            sample_weight = pd.Series(1, index=X.index)
-        else:
+        sample_weight = None
+        if self.sample_weight_col is not None:
             sample_weight = X[self.sample_weight_col]
-        X = X[self.cols].copy()
-        y = y.copy()
+        X = pd.DataFrame({col: X[col] for col in self.cols}, copy=False)
         if isinstance(y, pd.Series):
             y = y.values
         self._validate_data(X, y, dtype=None, y_numeric=True)
@@ -47,36 +47,54 @@ class TargetEncoder(BaseEstimator, TransformerMixin):
         if self.verbose:
             logger.info("Fitting...")
 
-        X["target_denominator"] = sample_weight
-        X["target_numerator"] = y * sample_weight
+        if sample_weight is None:
+            X["target_numerator"] = y
+        else:
+            X["target_denominator"] = sample_weight
+            X["target_numerator"] = y * sample_weight
 
         self.total_ratio_ = np.average(y, weights=sample_weight)
 
         self.groups_ = {}
+        self.categories_ = {}
+        self.ratios_ = {}
         for col in self.cols:
-            self.groups_[col] = X.groupby(col)[["target_numerator", "target_denominator"]].sum()
-            self.groups_[col]["ratio"] = (
-                self.groups_[col]["target_numerator"] + self.total_ratio_ * self.C
-            ) / (self.groups_[col]["target_denominator"] + self.C)
+            if sample_weight is None:
+                self.groups_[col] = X.groupby(col)["target_numerator"].agg(
+                    target_numerator="sum", target_denominator="size"
+                )
+            else:
+                self.groups_[col] = X.groupby(col)[
+                    ["target_numerator", "target_denominator"]
+                ].sum()
+            # Smoothing is computed on numpy arrays without aligning intermediate series
+            numerator = self.groups_[col]["target_numerator"].to_numpy(dtype=float)
+            denominator = self.groups_[col]["target_denominator"].to_numpy(dtype=float)
+            self.groups_[col]["ratio"] = (numerator + self.total_ratio_ * self.C) / (
+                denominator + self.C
+            )
+            # Categories are indexed once to map values by their positions in transform
+            self.categories_[col] = self.groups_[col].index
+            # Ratios are fitted in float64 and mapped in `dtype`, f.e. float32 moves less memory
+            self.ratios_[col] = self.groups_[col]["ratio"].to_numpy(dtype=self.dtype)
         return self
 
     def transform(self, X: pd.DataFrame) -> pd.DataFrame:
         check_is_fitted(self)
-        X = X[self.cols].copy()
+        X = X[self.cols]
         self._validate_data(X, dtype=None)
 
         if self.verbose:
             logger.info("Transforming...")
-        has_na = False
-        self.result_ = pd.DataFrame(index=X.index, dtype=float)
-        for col in self.cols:
+        result = np.full((len(X), len(self.cols)), self.total_ratio_, dtype=self.dtype)
+        for i, col in enumerate(self.cols):
             if self.verbose:
                 logger.info(f"Mapping {col}...")
-            mean_target = self.groups_[col]["ratio"]
-            self.result_[col] = X[col].map(mean_target)
-            has_na = self.result_.isna().any().any()
-        if has_na:
-            self.result_ = self.result_.fillna(self.total_ratio_)
+            # Ratios are gathered by category positions, unknown categories keep global average
+            codes = self.categories_[col].get_indexer(X[col])
+            known = codes >= 0
+            result[known, i] = self.ratios_[col][codes[known]]
+        self.result_ = pd.DataFrame(result, index=X.index, columns=self.cols)
         if self.verbose:
             logger.info("Completed.")
         return self.result_
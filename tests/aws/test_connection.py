@@ -1,3 +1,6 @@
+import copy
+import pickle
+import pytest
 from sqlalchemy import text
 
 from bi_utils.aws import connection
@@ -5,7 +8,7 @@ from bi_utils.aws import connection
 
 def test_get_creds():
     creds = connection.get_creds()
-    assert all(key in creds for key in ("username", "password", "host", "port", "dbname"))
+    assert all(getattr(creds, key) for key in ("username", "password", "host", "port", "dbname"))
 
 
 def test_get_redshift():
@@ -28,3 +31,155 @@ def test_connect():
             cursor.execute("SELECT 1")
             result = cursor.fetchall()
             assert len(result) == 1
+
+
+def test_get_creds_cache_clear(monkeypatch):
+    secret_id = "test/bi_utils"
+    loaded = []
+
+    class SecretsManager:
+        def get_secret_value(self, SecretId):
+            loaded.append(SecretId)
+            return {"SecretString": f'{{"host": "localhost", "password": "{len(loaded)}"}}'}
+
+    monkeypatch.setattr(connection.boto3, "client", lambda service: SecretsManager())
+    connection._secretsmanager_client.cache_clear()
+    connection.get_creds.cache_clear()
+    assert connection.get_creds(secret_id).password == "1"
+    assert connection.get_creds(secret_id=secret_id).password == "1"
+    assert loaded == [secret_id]
+    connection.get_creds.cache_clear()
+    assert connection.get_creds(secret_id).password == "2"
+    connection._secretsmanager_client.cache_clear()
+    connection.get_creds.cache_clear()
+
+
+def test_creds_copy():
+    creds = connection.Creds.from_secret({"host": "localhost", "password": "secret"})
+    assert pickle.loads(pickle.dumps(creds)) == creds
+    assert copy.deepcopy(creds) == creds
+    assert "secret" not in repr(creds)
+
+
+class Connection:
+    def __init__(self, alive=True):
+        self.alive = alive
+        self.closed = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+    def cursor(self):
+        return self
+
+    def execute(self, query):
+        if not self.alive:
+            raise connection.psycopg2.OperationalError("server closed the connection")
+
+
+class ConnectionPool:
+    def __init__(self, minconn, maxconn, **kwargs):
+        self.kwargs = kwargs
+        self.idle = [Connection()]
+
+    def getconn(self):
+        return self.idle.pop() if self.idle else Connection()
+
+    def putconn(self, conn, close=False):
+        if close:
+            conn.closed = 1
+        else:
+            self.idle.append(conn)
+
+    def closeall(self):
+        self.idle = None
+
+
+def test_connect_pool(monkeypatch):
+    creds = connection.Creds.from_secret({"host": "localhost", "password": "1"})
+    monkeypatch.setattr(connection, "get_creds", lambda secret_id: creds)
+    monkeypatch.setattr(connection.pool, "ThreadedConnectionPool", ConnectionPool)
+    monkeypatch.setattr(connection, "pools", {})
+    monkeypatch.setattr(connection, "pool_users", {})
+    monkeypatch.setattr(connection, "retired_pools", set())
+    with connection.pooled_connection("schema") as conn:
+        pass
+    with connection.pooled_connection("schema") as same_conn:
+        assert same_conn is conn
+        (old_pool, _), = connection.pools.values()
+        creds = connection.Creds.from_secret({"host": "localhost", "password": "2"})
+        with connection.pooled_connection("schema") as new_conn:
+            assert new_conn is not conn
+        assert old_pool.idle == []
+    assert old_pool.idle is None
+    (new_pool, _), = connection.pools.values()
+    creds = connection.Creds.from_secret({"host": "localhost", "password": "3"})
+    with connection.pooled_connection("schema"):
+        pass
+    assert new_pool.idle is None
+    assert len(connection.pools) == 1
+    assert not connection.retired_pools
+
+
+def test_connect_pool_broken(monkeypatch):
+    creds = connection.Creds.from_secret({"host": "localhost", "password": "1"})
+    monkeypatch.setattr(connection, "get_creds", lambda secret_id: creds)
+    monkeypatch.setattr(connection.pool, "ThreadedConnectionPool", ConnectionPool)
+    monkeypatch.setattr(connection, "pools", {})
+    monkeypatch.setattr(connection, "pool_users", {})
+    with connection.pooled_connection("schema") as conn:
+        pass
+    (conn_pool, _), = connection.pools.values()
+    broken_conns = [Connection(alive=False), Connection(alive=False)]
+    conn_pool.idle = [conn] + broken_conns
+    conn.closed = 1
+    with connection.pooled_connection("schema", maxconn=3) as new_conn:
+        assert new_conn.alive
+        assert new_conn is not conn
+    assert all(broken_conn.closed for broken_conn in broken_conns)
+    assert conn_pool.idle == [new_conn]
+
+
+def test_create_engine_reuse(monkeypatch):
+    creds = connection.Creds.from_secret({"host": "localhost", "port": 5439, "password": "1"})
+    monkeypatch.setattr(connection, "get_creds", lambda secret_id: creds)
+    monkeypatch.setattr(connection, "engines", {})
+    engine = connection.create_engine()
+    assert connection.create_engine() is engine
+    disposed = []
+    monkeypatch.setattr(engine, "dispose", lambda: disposed.append(engine))
+    creds = connection.Creds.from_secret({"host": "localhost", "port": 5439, "password": "2"})
+    assert connection.create_engine() is not engine
+    assert disposed == [engine]
+    assert len(connection.engines) == 1
+
+
+@pytest.mark.parametrize(
+    "token, expected_creds",
+    [
+        (None, "aws_access_key_id=key;aws_secret_access_key=secret"),
+        ("token", "aws_access_key_id=key;aws_secret_access_key=secret;token=token"),
+    ],
+)
+def test_get_s3_credentials(monkeypatch, token, expected_creds):
+    class Credentials:
+        access_key = "key"
+        secret_key = "secret"
+
+        def get_frozen_credentials(self):
+            return self
+
+    Credentials.token = token
+
+    class Session:
+        def get_credentials(self):
+            return Credentials()
+
+    monkeypatch.setattr(connection.boto3, "Session", Session)
+    connection._session.cache_clear()
+    assert connection.get_s3_credentials() == expected_creds
+    assert connection._session() is connection._session()
+    connection._session.cache_clear()
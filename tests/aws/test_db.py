@@ -1,6 +1,10 @@
+import os
+import gzip
 import pytest
+import posixpath
 import pandas as pd
 import datetime as dt
+import pyarrow.dataset as pds
 
 from bi_utils.aws import db
 
@@ -9,11 +13,521 @@ table = "dqc_bi_utils_tests"
 schema = "data_quality_monitoring"
 
 
+@pytest.fixture
+def csv_files(tmp_path):
+    header = "text,predict_dt,version,is_paid,status\n"
+    contents = [
+        header + ",2020-01-01,1,t,t\n,2021-02-03,2,,f\n",
+        header + "bye,,3,f,\n",
+        "",
+    ]
+    filenames = []
+    for i, content in enumerate(contents):
+        filename = str(tmp_path / f"data_000{i}_part_00.gz")
+        with gzip.open(filename, "wt") as file:
+            file.write(content)
+        filenames.append(filename)
+    return filenames
+
+
+@pytest.fixture
+def redshift(monkeypatch):
+    class Cursor:
+        def __init__(self, conn):
+            self.conn = conn
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            pass
+
+        def execute(self, query, params=None):
+            self.conn.queries.append(query if params is None else (query, params))
+
+        def fetchall(self):
+            return [(f"{path} ",) for path in self.conn.unloaded_paths]
+
+    class Connection:
+        def __init__(self):
+            self.queries = []
+            self.unloaded_paths = []
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            pass
+
+        def cursor(self):
+            return Cursor(self)
+
+    conn = Connection()
+    monkeypatch.setattr(db.connection, "pooled_connection", lambda *args, **kwargs: conn)
+    monkeypatch.setattr(db.connection, "get_s3_credentials", lambda: "creds")
+    return conn
+
+
+@pytest.mark.parametrize("chunking", [False, True])
+def test_read_files(csv_files, chunking):
+    data = db.read_files(
+        csv_files,
+        parse_dates=["predict_dt"],
+        parse_bools=["is_paid"],
+        dtype={"version": "int32"},
+        chunking=chunking,
+    )
+    if chunking:
+        data = pd.concat(data, ignore_index=True)
+    expected_data = pd.DataFrame(
+        {
+            "text": [None, None, "bye"],
+            "predict_dt": pd.to_datetime(["2020-01-01", "2021-02-03", None]),
+            "version": pd.Series([1, 2, 3], dtype="int32"),
+            "is_paid": pd.Series([True, pd.NA, False], dtype="boolean"),
+            "status": ["t", "f", None],
+        }
+    )
+    assert data.equals(expected_data)
+
+
+def test_read_files_chunking_prefetch(tmp_path, monkeypatch):
+    started = []
+
+    def read_file(filename, **kwargs):
+        started.append(filename)
+        return pd.DataFrame({"version": [len(started)]})
+
+    monkeypatch.setattr(db, "_read_file", read_file)
+    filenames = []
+    for i in range(8):
+        filename = str(tmp_path / f"data_000{i}_part_00.csv")
+        open(filename, "w").close()
+        filenames.append(filename)
+    chunks = db.read_files(filenames, chunking=True)
+    next(chunks)
+    assert len(started) <= db.CHUNK_PREFETCH
+    assert len(list(chunks)) == len(filenames) - 1
+
+
+@pytest.mark.parametrize("chunking", [False, True])
+def test_read_files_bools(tmp_path, chunking):
+    filename = str(tmp_path / "data_0000_part_00.gz")
+    with gzip.open(filename, "wt") as file:
+        file.write("is_paid,is_trial\nt,f\nf,\n,true\n")
+    data = db.read_files(filename, parse_bools=["is_paid", "is_trial"], chunking=chunking)
+    if chunking:
+        data = pd.concat(data, ignore_index=True)
+    expected_data = pd.DataFrame(
+        {
+            "is_paid": pd.Series([True, False, pd.NA], dtype="boolean"),
+            "is_trial": pd.Series([False, pd.NA, pd.NA], dtype="boolean"),
+        }
+    )
+    assert data.equals(expected_data)
+
+
+def test_read_files_strings(tmp_path):
+    filename = str(tmp_path / "data_0000_part_00.gz")
+    with gzip.open(filename, "wt") as file:
+        file.write("text,flag,version\n2020-01-01,true,1\n")
+    data = db.read_files(filename)
+    expected_data = pd.DataFrame({"text": ["2020-01-01"], "flag": ["true"], "version": [1]})
+    assert data.equals(expected_data)
+
+
+@pytest.mark.parametrize("chunking", [False, True])
+def test_read_files_str_nulls(tmp_path, chunking):
+    filename = str(tmp_path / "data_0000_part_00.gz")
+    with gzip.open(filename, "wt") as file:
+        file.write("text,version\nhi,1\n,2\n")
+    data = db.read_files(filename, dtype={"text": str}, chunking=chunking)
+    if chunking:
+        data = pd.concat(data, ignore_index=True)
+    assert data["text"].tolist() == ["hi", None]
+
+
+def test_read_files_concat_dates(tmp_path):
+    parts = ["version,created_at\n", "version,created_at\n1,2020-01-01 10:00:00+00\n"]
+    for i, part in enumerate(parts):
+        with gzip.open(tmp_path / f"data_000{i}_part_00.gz", "wt") as file:
+            file.write(part)
+    data = db.read_files(
+        sorted(str(path) for path in tmp_path.iterdir()), parse_dates=["created_at"]
+    )
+    expected_data = pd.DataFrame(
+        {"version": [1], "created_at": pd.to_datetime(["2020-01-01 10:00"], utc=True)}
+    )
+    assert data.equals(expected_data)
+
+
+def test_read_files_concat_types(tmp_path):
+    parts = ["text,version\n,\n,\n", "text,version\nhi,2\n"]
+    for i, part in enumerate(parts):
+        with gzip.open(tmp_path / f"data_000{i}_part_00.gz", "wt") as file:
+            file.write(part)
+    data = db.read_files(sorted(str(path) for path in tmp_path.iterdir()))
+    expected_data = pd.DataFrame({"text": [None, None, "hi"], "version": [None, None, 2.0]})
+    assert data.equals(expected_data)
+
+
+def test_read_files_isal(tmp_path, monkeypatch):
+    opened = []
+
+    class IgzipThreaded:
+        def open(self, filename, mode):
+            opened.append(filename)
+            return gzip.open(filename, mode)
+
+    monkeypatch.setattr(db, "igzip_threaded", IgzipThreaded())
+    filename = str(tmp_path / "data_0000_part_00.gz")
+    with gzip.open(filename, "wt") as file:
+        file.write("version\n1\n2\n")
+    data = db.read_files(filename)
+    assert opened == [filename]
+    assert data.equals(pd.DataFrame({"version": [1, 2]}))
+
+
+def test_read_files_timezone(tmp_path):
+    filename = str(tmp_path / "data_0000_part_00.gz")
+    with gzip.open(filename, "wt") as file:
+        file.write("created_at,predict_dt\n2020-01-01 12:00:00+00,2020-01-01\n,\n")
+    data = db.read_files(filename, parse_dates=["created_at", "predict_dt"])
+    expected_data = pd.DataFrame(
+        {
+            "created_at": pd.to_datetime(["2020-01-01 12:00:00", None]).tz_localize("UTC"),
+            "predict_dt": pd.to_datetime(["2020-01-01", None]),
+        }
+    )
+    assert data.equals(expected_data)
+
+
+@pytest.mark.parametrize("chunking", [False, True])
+def test_read_files_parquet(tmp_path, chunking):
+    data = pd.DataFrame(
+        {
+            "text": ["hello", None, "bye"],
+            "version": [1, 2, 3],
+            "is_paid": [True, None, False],
+        }
+    )
+    data.iloc[:2].to_parquet(tmp_path / "data_0000_part_00.parquet")
+    data.iloc[2:].to_parquet(tmp_path / "data_0001_part_00.parquet")
+    filenames = sorted(str(path) for path in tmp_path.iterdir())
+    read_data = db.read_files(
+        filenames,
+        parse_bools=["is_paid"],
+        dtype={"version": "int32"},
+        chunking=chunking,
+        remove_dir=True,
+    )
+    if chunking:
+        read_data = pd.concat(read_data, ignore_index=True)
+    assert read_data.equals(data.astype({"version": "int32", "is_paid": "boolean"}))
+    assert not tmp_path.exists()
+
+
+@pytest.mark.parametrize("chunking", [False, True])
+@pytest.mark.parametrize("filters", [[("version", ">", 1)], pds.field("version") > 1])
+def test_read_files_columns_filters(csv_files, chunking, filters):
+    data = db.read_files(
+        csv_files,
+        parse_bools=["is_paid"],
+        dtype={"version": "int32"},
+        columns=["is_paid", "text"],
+        filters=filters,
+        chunking=chunking,
+    )
+    if chunking:
+        data = pd.concat(data, ignore_index=True)
+    expected_data = pd.DataFrame(
+        {
+            "is_paid": pd.Series([pd.NA, False], dtype="boolean"),
+            "text": [None, "bye"],
+        }
+    )
+    assert data.equals(expected_data)
+
+
+def test_read_files_parquet_row_groups(tmp_path):
+    data = pd.DataFrame({"text": ["hello", None, "bye"], "version": [1, 2, 3]})
+    data.to_parquet(tmp_path / "data_0000_part_00.parquet", row_group_size=2)
+    data.to_parquet(tmp_path / "data_0001_part_00.parquet", row_group_size=2)
+    filenames = sorted(str(path) for path in tmp_path.iterdir())
+    chunks = list(db.read_files(filenames, chunking=True, remove_dir=True))
+    assert [len(chunk) for chunk in chunks] == [2, 1, 2, 1]
+    assert pd.concat(chunks, ignore_index=True).equals(pd.concat([data, data], ignore_index=True))
+    assert not tmp_path.exists()
+
+
+def test_read_files_parquet_columns_filters(tmp_path):
+    data = pd.DataFrame({"text": ["hello", None, "bye"], "version": [1, 2, 3]})
+    data.iloc[:2].to_parquet(tmp_path / "data_0000_part_00.parquet")
+    data.iloc[2:].to_parquet(tmp_path / "data_0001_part_00.parquet")
+    filenames = sorted(str(path) for path in tmp_path.iterdir())
+    read_data = db.read_files(filenames, columns=["text"], filters=[("version", "!=", 2)])
+    assert read_data.equals(pd.DataFrame({"text": ["hello", "bye"]}))
+
+
+@pytest.mark.parametrize("file_format", ["csv", "parquet"])
+def test_upload_data_columns(tmp_path, monkeypatch, file_format):
+    uploads = []
+    monkeypatch.setattr(db, "upload_file", lambda **kwargs: uploads.append(kwargs))
+    data = pd.DataFrame({"text": ["hello", "bye"], "version": [1, 2], "extra": [None, 1.5]})
+    file_path = str(tmp_path / f"data.{file_format}")
+    db.upload_data(data, file_path, schema=schema, table=table, columns=["version", "text"])
+    assert uploads[0]["table"] == table
+    assert uploads[0]["columns"] == ["version", "text"]
+    if file_format == "csv":
+        saved_data = pd.read_csv(file_path)
+    else:
+        saved_data = pd.read_parquet(file_path)
+    assert saved_data.equals(data[["version", "text"]])
+
+
+def test_upload_data_csv_objects(tmp_path, monkeypatch):
+    monkeypatch.setattr(db, "upload_file", lambda **kwargs: None)
+    data = pd.DataFrame(
+        {
+            "created_at": pd.to_datetime(["2020-01-01 01:02:03.5", None]),
+            "is_paid": [True, None],
+            "payload": [{"a": 1}, "text"],
+        }
+    )
+    file_path = str(tmp_path / "data.csv")
+    db.upload_data(data, file_path, schema=schema, table=table, columns=["created_at", "is_paid"])
+    with open(file_path) as file:
+        assert file.read() == '"created_at","is_paid"\n2020-01-01 01:02:03.500000,true\n,\n'
+    db.upload_data(data, file_path, schema=schema, table=table)
+    saved_data = pd.read_csv(file_path)
+    assert saved_data["payload"].tolist() == ["{'a': 1}", "text"]
+
+
+def test_upload_data_remove_file_streams(tmp_path, monkeypatch):
+    uploads = []
+    monkeypatch.setattr(db, "upload_dataframe", lambda data, **kwargs: uploads.append(kwargs))
+    data = pd.DataFrame({"text": ["hello", "bye"], "version": [1, 2]})
+    file_path = str(tmp_path / "data.csv")
+    db.upload_data(data, file_path, schema=schema, table=table, remove_file=True, retries=2)
+    assert uploads[0]["table"] == table
+    assert uploads[0]["retries"] == 2
+    assert not os.listdir(tmp_path)
+
+
+def test_upload_file_s3_uri(redshift):
+    s3_uri = "s3://gismart-analytics/dwh/temp/data.parquet"
+    db.upload_file(
+        "data.parquet",
+        schema=schema,
+        table=table,
+        columns=["text", "version"],
+        s3_uri=s3_uri,
+    )
+    assert redshift.queries == [
+        f"COPY {schema}.{table} (text,version) FROM '{s3_uri}' CREDENTIALS 'creds' PARQUET"
+    ]
+
+
+def test_upload_file_multipart(tmp_path, monkeypatch, redshift):
+    uploads = []
+    deleted = []
+
+    class Client:
+        def upload_file(self, file_path, bucket, bucket_path, Config):
+            uploads.append((file_path, bucket, bucket_path, Config.max_concurrency))
+
+        def delete_objects(self, Bucket, Delete):
+            deleted.extend(obj["Key"] for obj in Delete["Objects"])
+
+    monkeypatch.setattr(db.s3, "_client", lambda *args: Client())
+    file_path = str(tmp_path / "data.csv")
+    pd.DataFrame({"text": ["hello"], "version": [1]}).to_csv(file_path, index=False)
+    db.upload_file(file_path, schema=schema, table=table, add_s3_timestamp_dir=False)
+    assert uploads == [(file_path, "gismart-analytics", "dwh/temp/data.csv", 16)]
+    assert redshift.queries == [
+        f"COPY {schema}.{table} (text,version) FROM 's3://gismart-analytics/dwh/temp/data.csv' "
+        "CREDENTIALS 'creds' DELIMITER ',' CSV IGNOREHEADER 1 "
+        "DATEFORMAT 'auto' COMPUPDATE ON TRUNCATECOLUMNS"
+    ]
+    assert deleted == ["dwh/temp/data.csv"]
+
+
+def test_upload_data_partitions(tmp_path, monkeypatch, redshift):
+    uploads = []
+    deleted = []
+
+    class Client:
+        def upload_file(self, file_path, bucket, bucket_path, Config):
+            uploads.append(bucket_path)
+
+        def delete_objects(self, Bucket, Delete):
+            deleted.extend(obj["Key"] for obj in Delete["Objects"])
+
+    monkeypatch.setattr(db.s3, "_client", lambda *args: Client())
+    data = pd.DataFrame({"text": ["hello", "bye"], "version": [1, 2]})
+    file_path = str(tmp_path / "data.parquet")
+    db.upload_data(
+        data,
+        file_path,
+        schema=schema,
+        table=table,
+        partition_cols=["version"],
+        add_s3_timestamp_dir=False,
+    )
+    assert [posixpath.dirname(path) for path in uploads] == [
+        "dwh/temp/data.parquet/version=1",
+        "dwh/temp/data.parquet/version=2",
+    ]
+    assert "FROM 's3://gismart-analytics/dwh/temp/data.parquet/'" in redshift.queries[0]
+    assert deleted == uploads
+
+
+def test_gzip_csv_chunks_write_csv(tmp_path):
+    data = pd.DataFrame(
+        {
+            "is_paid": [True, False, None],
+            "created_at": pd.to_datetime(["2020-01-01 10:00", None, "2021-02-03 00:00"], utc=True),
+        }
+    )
+    csv_path = str(tmp_path / "data.csv")
+    db.files.write_csv(data, csv_path)
+    with open(csv_path, "rb") as file:
+        written = file.read()
+    chunks = db._gzip_csv_chunks(data, columns=list(data.columns), chunk_rows=2)
+    assert gzip.decompress(b"".join(chunks)) == written
+
+
+def test_upload_dataframe(monkeypatch, redshift):
+    parts = []
+    deleted = []
+
+    class Client:
+        def create_multipart_upload(self, Bucket, Key):
+            return {"UploadId": "upload"}
+
+        def upload_part(self, Body, PartNumber, **kwargs):
+            parts.append(Body)
+            return {"ETag": str(PartNumber)}
+
+        def complete_multipart_upload(self, MultipartUpload, **kwargs):
+            assert len(MultipartUpload["Parts"]) == len(parts)
+
+        def delete_objects(self, Bucket, Delete):
+            deleted.extend(obj["Key"] for obj in Delete["Objects"])
+
+    monkeypatch.setattr(db.s3, "_client", lambda *args: Client())
+    data = pd.DataFrame({"text": ["hello", "bye", None], "version": [1, 2, 3]})
+    db.upload_dataframe(data, schema=schema, table=table, chunk_rows=2, add_s3_timestamp_dir=False)
+    bucket_path = f"dwh/temp/{table}.csv.gz"
+    assert gzip.decompress(b"".join(parts)) == b'"text","version"\n"hello",1\n"bye",2\n,3\n'
+    assert redshift.queries == [
+        f"COPY {schema}.{table} (text,version) FROM 's3://gismart-analytics/{bucket_path}' "
+        "CREDENTIALS 'creds' DELIMITER ',' CSV GZIP IGNOREHEADER 1 "
+        "DATEFORMAT 'auto' COMPUPDATE ON TRUNCATECOLUMNS"
+    ]
+    assert deleted == [bucket_path]
+
+
+def test_download_files_parallel(tmp_path, monkeypatch, redshift):
+    deleted = []
+    bucket_paths = [f"dwh/temp/data_000{i}_part_00.parquet" for i in range(3)]
+
+    class Client:
+        def download_file(self, bucket, bucket_path, file_path):
+            with open(file_path, "w") as file:
+                file.write(bucket_path)
+
+        def delete_objects(self, Bucket, Delete):
+            deleted.extend(obj["Key"] for obj in Delete["Objects"])
+
+    redshift.unloaded_paths = [f"s3://gismart-analytics/{path}" for path in bucket_paths]
+    monkeypatch.setattr(db.s3, "_client", lambda *args: Client())
+    filenames = db.download_files(
+        "SELECT 1",
+        str(tmp_path),
+        add_timestamp_dir=False,
+        add_s3_timestamp_dir=False,
+    )
+    assert redshift.queries[0] == (
+        "UNLOAD ('SELECT 1') TO 's3://gismart-analytics/dwh/temp/' CREDENTIALS 'creds' "
+        "PARQUET PARALLEL ON MAXFILESIZE 6000 MB ALLOWOVERWRITE"
+    )
+    assert filenames == [str(tmp_path / os.path.basename(path)) for path in bucket_paths]
+    for filename, bucket_path in zip(filenames, bucket_paths):
+        with open(filename) as file:
+            assert file.read() == bucket_path
+    assert deleted == bucket_paths
+
+
+@pytest.mark.parametrize("chunking", [False, True])
+@pytest.mark.parametrize("file_format", ["csv", "parquet"])
+def test_download_data_pipeline(tmp_path, monkeypatch, redshift, file_format, chunking):
+    deleted = []
+    data = pd.DataFrame({"text": ["hello", None, "bye"], "version": [1, 2, 3]})
+    if file_format == "csv":
+        bucket_paths = [f"dwh/temp/000{i}_part_00.gz" for i in range(2)]
+        contents = [
+            gzip.compress(data.iloc[:2].to_csv(index=False).encode()),
+            gzip.compress(data.iloc[2:].to_csv(index=False).encode()),
+        ]
+    else:
+        bucket_paths = [f"dwh/temp/000{i}_part_00.parquet" for i in range(2)]
+        contents = [data.iloc[:2].to_parquet(), data.iloc[2:].to_parquet(index=False)]
+    objects = dict(zip(bucket_paths, contents))
+
+    class Client:
+        def download_file(self, bucket, bucket_path, file_path):
+            with open(file_path, "wb") as file:
+                file.write(objects[bucket_path])
+
+        def delete_objects(self, Bucket, Delete):
+            deleted.extend(obj["Key"] for obj in Delete["Objects"])
+
+    redshift.unloaded_paths = [f"s3://gismart-analytics/{path}" for path in bucket_paths]
+    monkeypatch.setattr(db.s3, "_client", lambda *args: Client())
+    temp_dir = tmp_path / "temp"
+    downloaded_data = db.download_data(
+        "SELECT 1",
+        file_format=file_format,
+        temp_dir=str(temp_dir),
+        chunking=chunking,
+        add_timestamp_dir=False,
+    )
+    if chunking:
+        downloaded_data = pd.concat(downloaded_data, ignore_index=True)
+    assert downloaded_data.equals(data)
+    assert sorted(deleted) == bucket_paths
+    assert not temp_dir.exists()
+
+
 def test_delete_wo_conditions():
     with pytest.raises(ValueError, match=".* at least 1 equal condition .*"):
         db.delete(table, schema=schema)
 
 
+def test_delete_many_keys(monkeypatch, redshift):
+    inserted = []
+    monkeypatch.setattr(
+        db.extras,
+        "execute_values",
+        lambda cursor, query, rows, page_size: inserted.append((query, len(rows))),
+    )
+    monkeypatch.setattr(db, "DELETE_KEYS_LIMIT", 2)
+    db.delete(table, schema=schema, version=4, user_id=[1, 2, 3], os_name=["ios", "web"])
+    assert inserted == [("INSERT INTO delete_keys_0 VALUES %s", 3)]
+    assert redshift.queries == [
+        "CREATE TEMP TABLE delete_keys_0 AS "
+        f"SELECT user_id AS delete_key FROM {schema}.{table} WHERE 1 = 0",
+        (
+            f"DELETE FROM {schema}.{table} USING delete_keys_0 "
+            "WHERE version = %s AND os_name IN %s "
+            f"AND {schema}.{table}.user_id = delete_keys_0.delete_key",
+            (4, ("ios", "web")),
+        ),
+        "DROP TABLE delete_keys_0",
+    ]
+
+
 @pytest.mark.parametrize(
     "file_format",
     ["csv", "parquet"],
@@ -112,4 +626,79 @@ def test_download_empty(file_format):
 
 def test_get_columns():
     db_columns = db.get_columns(table=table, schema=schema)
-    assert db_columns == ["text", "predict_dt", "load_dttm", "version"]
+    assert db_columns == ("text", "predict_dt", "load_dttm", "version")
+
+
+def test_get_columns_cache(monkeypatch):
+    queries = []
+
+    class Cursor:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            pass
+
+        def execute(self, query, params):
+            queries.append(params)
+
+        def fetchall(self):
+            return [("text",), ("version",)]
+
+    class Connection:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            pass
+
+        def cursor(self):
+            return Cursor()
+
+    monkeypatch.setattr(db.connection, "pooled_connection", lambda *args, **kwargs: Connection())
+    db.get_columns.cache_clear()
+    assert db.get_columns("cached_table", schema=schema) == ("text", "version")
+    assert db.get_columns(table="cached_table", schema=schema) == ("text", "version")
+    assert queries == [(schema, "cached_table")]
+    db.get_columns.cache_clear()
+
+
+@pytest.mark.parametrize("chunking", [False, True])
+def test_download_data_probe_empty(monkeypatch, chunking):
+    queries = []
+
+    class Cursor:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            pass
+
+        def execute(self, query):
+            queries.append(query)
+
+        def fetchone(self):
+            return None
+
+    class Connection:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            pass
+
+        def cursor(self):
+            return Cursor()
+
+    def download_files(**kwargs):
+        raise AssertionError("UNLOAD should be skipped for empty query")
+
+    monkeypatch.setattr(db.connection, "pooled_connection", lambda *args, **kwargs: Connection())
+    monkeypatch.setattr(db, "download_files", download_files)
+    data = db.download_data(f"SELECT * FROM {schema}.{table};", chunking=chunking, probe=True)
+    if chunking:
+        data = pd.concat(data)
+    assert data.empty
+    assert queries == [
+        f"SELECT 1 WHERE EXISTS (SELECT 1 FROM (SELECT * FROM {schema}.{table}) AS probe LIMIT 1)"
+    ]
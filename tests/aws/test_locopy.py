@@ -10,3 +10,11 @@ def test_progress_percentage(data_path):
         percentage(percentage._size)
     except Exception as e:
         pytest.fail(str(e))
+
+
+def test_progress_percentage_tenths(data_path, capsys):
+    percentage = locopy.ProgressPercentage(data_path)
+    percentage(0)
+    percentage(0)
+    percentage(percentage._size)
+    assert capsys.readouterr().out == "\rTransfering [] 0%\rTransfering [##########] 100%\n"
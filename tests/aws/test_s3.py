@@ -26,5 +26,71 @@ def test_upload_file_download_dir_read_files(data_path):
     s3.upload_file(data_path, bucket_path)
     s3.download_dir(bucket_dir, download_dir)
     downloaded_data = db.read_files(download_dir)
-    local_data = pd.read_csv(data_path)
+    local_data = pd.read_csv(data_path, float_precision="round_trip")
     assert downloaded_data.equals(local_data)
+
+
+def test_download_files_workers(tmp_path, monkeypatch):
+    clients = []
+
+    class Client:
+        def download_file(self, bucket, bucket_path, file_path):
+            open(file_path, "w").close()
+
+    def client(workers, retries):
+        clients.append(workers)
+        return Client()
+
+    monkeypatch.setattr(s3, "_client", client)
+    monkeypatch.setattr(s3.os, "cpu_count", lambda: 2)
+    bucket_paths = [f"dwh/temp/000{i}_part_00" for i in range(8)]
+    s3.download_files(bucket_paths[:2], str(tmp_path))
+    s3.download_files(bucket_paths, str(tmp_path))
+    s3.download_files(bucket_paths, str(tmp_path), max_workers=6)
+    assert clients == [2, 4, 6]
+    assert len(os.listdir(tmp_path)) == len(bucket_paths)
+
+
+def test_upload_file_max_concurrency(monkeypatch):
+    uploads = []
+
+    class Client:
+        def upload_file(self, file_path, bucket, bucket_path, Config):
+            uploads.append(Config.max_concurrency)
+
+    def client(workers):
+        uploads.append(workers)
+        return Client()
+
+    monkeypatch.setattr(s3, "_client", client)
+    assert s3.upload_file("/tmp/data.csv", "dwh/temp", max_concurrency=4)
+    assert uploads == [4, 4]
+
+
+def test_download_dir_parallel(tmp_path, monkeypatch):
+    keys = ["dwh/temp/dir/", "dwh/temp/dir/0000_part_00", "dwh/temp/dir/0001_part_00"]
+
+    class Paginator:
+        def paginate(self, Bucket, Prefix):
+            return [{"Contents": [{"Key": key} for key in keys if key.startswith(Prefix)]}]
+
+    class Client:
+        def get_paginator(self, operation_name):
+            return Paginator()
+
+        def download_file(self, bucket, bucket_path, file_path):
+            open(file_path, "w").close()
+
+    monkeypatch.setattr(s3, "_client", lambda *args: Client())
+    assert s3.download_dir("dwh/temp/dir", str(tmp_path), files_prefix="data_")
+    assert sorted(os.listdir(tmp_path)) == ["data_0000_part_00", "data_0001_part_00"]
+
+
+def test_client_retries(monkeypatch):
+    configs = []
+    monkeypatch.setattr(s3.boto3, "client", lambda service, config: configs.append(config))
+    s3._client.cache_clear()
+    s3._client(4)
+    s3._client(4, 10)
+    s3._client.cache_clear()
+    assert [config.retries["max_attempts"] for config in configs] == [s3.DEFAULT_RETRIES, 10]
@@ -1,4 +1,6 @@
+import types
 import pytest
+import threading
 
 from bi_utils import decorators
 
@@ -27,3 +29,69 @@ def test_retry_different_exception():
     dictionary = {}
     with pytest.raises(KeyError):
         unstable_func()
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = types.SimpleNamespace(now=0.0)
+    clock.monotonic = lambda: clock.now
+    monkeypatch.setattr(decorators, "time", clock)
+    return clock
+
+
+def test_ttl_cache(clock):
+    @decorators.ttl_cache(2)
+    def counter(key, step=1):
+        calls.append(key)
+        return len(calls) * step
+
+    calls = []
+    assert counter("a") == 1
+    assert counter("a", step=1) == 1
+    assert counter("b") == 2
+    clock.now = 2
+    assert counter("a") == 3
+    counter.cache_clear()
+    assert counter("b") == 4
+
+
+def test_ttl_cache_maxsize(clock):
+    @decorators.ttl_cache(2, maxsize=1)
+    def counter(key):
+        calls.append(key)
+        return len(calls)
+
+    calls = []
+    assert counter("a") == 1
+    assert counter("b") == 2
+    assert counter("a") == 3
+
+
+def test_ttl_cache_refresh(clock, monkeypatch):
+    class Thread:
+        # Reload runs synchronously to check its result without waiting for it
+        def __init__(self, target, args, daemon):
+            self.target = target
+            self.args = args
+
+        def start(self):
+            self.target(*self.args)
+
+    monkeypatch.setattr(
+        decorators, "threading", types.SimpleNamespace(Lock=threading.Lock, Thread=Thread)
+    )
+
+    @decorators.ttl_cache(4, refresh=True)
+    def counter():
+        calls.append(1)
+        return len(calls)
+
+    calls = []
+    assert counter() == 1
+    clock.now = 2
+    assert counter() == 1
+    clock.now = 3
+    assert counter() == 1
+    assert counter() == 2
+    clock.now = 7
+    assert counter() == 3
@@ -1,4 +1,8 @@
+import os
+import stat
+import gzip
 import pytest
+import pandas as pd
 import datetime as dt
 
 from bi_utils import files
@@ -34,3 +38,24 @@ def test_csv_columns(csv_filename, separator, expected_columns):
     csv_path = utils.data_path(csv_filename)
     columns = files.csv_columns(csv_path, separator=separator)
     assert columns == expected_columns
+
+
+@pytest.mark.parametrize("filename", ["data.csv", "data.csv.gz"])
+def test_write_csv(tmp_path, filename):
+    data = pd.DataFrame({"text": ["hello", None], "version": [1, 2], "extra": [1.5, None]})
+    csv_path = str(tmp_path / filename)
+    files.write_csv(data, csv_path, columns=["version", "text"], separator=";")
+    opener = gzip.open if filename.endswith(".gz") else open
+    with opener(csv_path, "rt") as file:
+        assert file.read() == '"version";"text"\n1;"hello"\n2;\n'
+    assert os.listdir(tmp_path) == [filename]
+
+
+def test_write_csv_permissions(tmp_path):
+    umask = os.umask(0o022)
+    try:
+        csv_path = str(tmp_path / "data.csv")
+        files.write_csv(pd.DataFrame({"version": [1]}), csv_path)
+    finally:
+        os.umask(umask)
+    assert stat.S_IMODE(os.stat(csv_path).st_mode) == 0o644
@@ -0,0 +1,32 @@
+import sys
+import pytest
+import subprocess
+
+import bi_utils
+
+
+def test_lazy_import():
+    code = "import sys, bi_utils; print(sorted({'boto3', 'pandas', 'sklearn'} & set(sys.modules)))"
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True)
+    assert result.stdout.strip() == "[]"
+
+
+@pytest.mark.parametrize(
+    "name, module_name",
+    [
+        ("db", "bi_utils.aws.db"),
+        ("connection", "bi_utils.aws.connection"),
+        ("transformers", "bi_utils.transformers"),
+        ("dict_merge", "bi_utils.recipes"),
+        ("QueueExporter", "bi_utils.queue_exporter"),
+    ],
+)
+def test_lazy_attribute(name, module_name):
+    value = getattr(bi_utils, name)
+    assert getattr(value, "__name__", None) == module_name or value.__module__ == module_name
+    assert name in dir(bi_utils)
+
+
+def test_missing_attribute():
+    with pytest.raises(AttributeError):
+        bi_utils.missing
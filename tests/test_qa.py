@@ -66,12 +66,57 @@ def test_empty_df_negative(sample_data):
             ["payment_number"],
             0,
         ),
+        (
+            pd.DataFrame(
+                {
+                    "country": ["US", "US", "CN", "CN"],
+                    "payment_number": [1, np.nan, 3, np.nan],
+                }
+            ),
+            ["country", "payment_number"],
+            0,
+        ),
+        (
+            pd.DataFrame(
+                {
+                    "country": ["US", "US", "CN", "CN"],
+                    "payment_number": [1, 2, np.nan, np.nan],
+                }
+            ),
+            ["country", "payment_number"],
+            1,
+        ),
+        (
+            pd.DataFrame(
+                {
+                    "country": pd.Categorical(["US", "US", "CN", "CN"], ["US", "CN", "DE"]),
+                    "payment_number": np.array([1, 2, 3, 3], dtype=np.int32),
+                }
+            ),
+            ["country", "payment_number"],
+            1,
+        ),
+        (
+            pd.DataFrame(
+                {
+                    "country": pd.Categorical(["US", "US", "CN", "CN"], ["US", "CN", "DE"]),
+                    "payment_number": np.array([1, 2, 3, 1], dtype=np.int32),
+                }
+            ),
+            ["country"],
+            1,
+        ),
     ],
 )
 def test_unique(df, unique_index, expected_status):
     assert qa.unique_index_test(df, unique_index) == expected_status
 
 
+def test_unique_column_name():
+    df = pd.DataFrame({"id": [1, 2, 2]})
+    assert qa.unique_index_test(df, "id") == 1
+
+
 @pytest.mark.parametrize(
     "df, thresholds, expected_status",
     [
@@ -95,12 +140,33 @@ def test_unique(df, unique_index, expected_status):
             {"conv_2": [0, 1]},
             0,
         ),
+        (
+            pd.DataFrame(
+                {
+                    "conv_1": [-0.5, np.nan, 2],
+                    "conv_2": [0.001, 0.999, np.nan],
+                }
+            ),
+            {"conv_1": [0, 1], "conv_2": [0, 1]},
+            2,
+        ),
     ],
 )
 def test_thresholds(df, thresholds, expected_status):
     assert qa.thresholds_test(df, thresholds) == expected_status
 
 
+def test_thresholds_datetime():
+    df = pd.DataFrame({"date": pd.to_datetime(["2020-01-01", None, "2021-06-01"])})
+    thresholds = {"date": [pd.Timestamp("2020-01-01"), pd.Timestamp("2020-12-31")]}
+    assert qa.thresholds_test(df, thresholds) == 1
+
+
+def test_thresholds_large_int():
+    df = pd.DataFrame({"id": np.array([2**53, 2**53 + 1], dtype=np.int64)})
+    assert qa.thresholds_test(df, {"id": [0, 2**53]}) == 1
+
+
 @pytest.mark.parametrize(
     "df, q, expected_status",
     [
@@ -189,6 +255,11 @@ def test_queries(df, q, expected_status):
     assert qa.query_test(df, q) == expected_status
 
 
+def test_queries_nullable():
+    df = pd.DataFrame({"a": pd.array([1, None, 3], dtype="Int64")})
+    assert qa.query_test(df, ["a > 1"]) == 1
+
+
 def test_df_test_nullable(sample_data):
     assert qa.df_test(sample_data, nullable_cols=[1], strict=False) == 0
 
@@ -197,3 +268,31 @@ def test_df_test_strict(sample_data):
     with pytest.raises(ValueError):
         qa.df_test(sample_data, strict=True)
     assert qa.df_test(sample_data, strict=False) == 1
+
+
+def test_df_test_subtests():
+    df = pd.DataFrame({"ltv_180": [0.5, 1.01, 2], "ltv_365": [0.5, 1, 3]})
+    failcount = qa.df_test(
+        df,
+        thresholds={"ltv_180": (0, 1)},
+        verify_queries=["ltv_365 < ltv_180"],
+        unique_index=["ltv_180"],
+    )
+    assert failcount == 2
+
+
+def test_find_common_features(caplog):
+    df = pd.DataFrame(
+        {
+            "country": ["US"] * 200,
+            "version": [1] * 199 + [2],
+            "user_id": range(200),
+            "os_name": [None] * 150 + ["ios"] * 50,
+        }
+    )
+    qa.find_common_features(df)
+    assert caplog.records[-1].getMessage() == (
+        "Analyzer: the incompliant rows have common features:\n"
+        "country      US\n"
+        "os_name    None"
+    )
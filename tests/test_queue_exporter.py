@@ -1,10 +1,15 @@
-import os
 import pytest
 import pandas as pd
 
 from bi_utils import queue_exporter
 
 
+@pytest.fixture(scope="module")
+def exporter():
+    with queue_exporter.QueueExporter() as exporter:
+        yield exporter
+
+
 def test_queue_exporter_alive():
     with queue_exporter.QueueExporter() as exporter:
         assert exporter.alive
@@ -18,10 +23,8 @@ def test_queue_exporter_close(data):
         exporter.export_df(data, "data.csv")
 
 
-def test_queue_exporter_export_df(data):
-    temp_data_path = "/tmp/data.pkl"
-    if os.path.exists(temp_data_path):
-        os.remove(temp_data_path)
+def test_queue_exporter_export_df(data, tmp_path):
+    temp_data_path = str(tmp_path / "data.pkl")
     with queue_exporter.QueueExporter() as exporter:
         exporter.export_df(data, temp_data_path)
     exporter.join()
@@ -29,6 +32,43 @@ def test_queue_exporter_export_df(data):
     assert exported_data.equals(data)
 
 
+def test_queue_exporter_shared_df(data):
+    shm_name = queue_exporter._share_df(data)
+    assert queue_exporter._load_shared_df(shm_name).equals(data)
+    with pytest.raises(FileNotFoundError):
+        queue_exporter.shared_memory.SharedMemory(name=shm_name)
+
+
+def test_queue_exporter_terminate(data, tmp_path):
+    exporter = queue_exporter.QueueExporter()
+    shm_name = queue_exporter._share_df(data)
+    exporter._shm_names.add(shm_name)
+    exporter.terminate()
+    assert not exporter.alive
+    with pytest.raises(FileNotFoundError):
+        queue_exporter.shared_memory.SharedMemory(name=shm_name)
+
+
+def test_queue_exporter_export_objects(tmp_path):
+    data = pd.DataFrame({"payload": [{"a": 1}, "text"]})
+    temp_data_path = str(tmp_path / "data.pkl")
+    assert queue_exporter._share_df(data) is None
+    with queue_exporter.QueueExporter() as exporter:
+        exporter.export_df(data, temp_data_path)
+    exporter.join()
+    assert pd.read_pickle(temp_data_path).equals(data)
+
+
+def test_queue_exporter_export_duplicate_columns(tmp_path):
+    data = pd.DataFrame([[1, 2]], columns=["a", "a"])
+    temp_data_path = str(tmp_path / "data.pkl")
+    assert queue_exporter._share_df(data) is None
+    with queue_exporter.QueueExporter() as exporter:
+        exporter.export_df(data, temp_data_path)
+    exporter.join()
+    assert pd.read_pickle(temp_data_path).equals(data)
+
+
 @pytest.mark.parametrize(
     "table, schema, s3_bucket, s3_bucket_dir",
     [
@@ -39,14 +79,13 @@ def test_queue_exporter_export_df(data):
         (None, None, None, "dwh/temp"),
     ],
 )
-def test_queue_exporter_bad_args(data, table, schema, s3_bucket, s3_bucket_dir):
+def test_queue_exporter_bad_args(exporter, data, table, schema, s3_bucket, s3_bucket_dir):
     with pytest.raises(ValueError, match=".*Pass both.*"):
-        with queue_exporter.QueueExporter() as exporter:
-            exporter.export_df(
-                data,
-                "data.csv",
-                table=table,
-                schema=schema,
-                s3_bucket=s3_bucket,
-                s3_bucket_dir=s3_bucket_dir,
-            )
+        exporter.export_df(
+            data,
+            "data.csv",
+            table=table,
+            schema=schema,
+            s3_bucket=s3_bucket,
+            s3_bucket_dir=s3_bucket_dir,
+        )
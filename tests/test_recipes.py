@@ -1,3 +1,4 @@
+import copy
 import pytest
 
 from bi_utils import recipes
@@ -16,8 +17,15 @@ from bi_utils import recipes
             {"a": {"two": [2, 2, 2]}},
             {"a": {"one": 1, "two": [2, 2, 2]}, "b": 3},
         ),
+        (
+            {"a": {"b": {"c": 1, "d": 2}}, "e": {"f": 3}},
+            {"a": {"b": {"c": 11}, "g": 4}, "e": 5},
+            {"a": {"b": {"c": 11, "d": 2}, "g": 4}, "e": 5},
+        ),
     ],
 )
 def test_dict_merge(reciever, updater, expected_dict):
+    reciever_copy = copy.deepcopy(reciever)
     result = recipes.dict_merge(reciever, updater)
     assert result == expected_dict
+    assert reciever == reciever_copy
@@ -1,3 +1,4 @@
+import os
 import pytest
 import datetime as dt
 
@@ -59,3 +60,37 @@ def test_build_set_wo_conditions():
 def test_build_where(params, expected_where):
     where_str = sql.build_where(**params)
     assert where_str == expected_where
+
+
+@pytest.mark.parametrize(
+    "params, expected_where, expected_params",
+    [
+        ({}, "WHERE 1 = 1", ()),
+        (
+            {"version": 4, "os_name": ["ios", "web"], "country": None, "date": dt.date(2021, 1, 1)},
+            "WHERE version = %s AND os_name IN %s AND country IS NULL AND date = %s",
+            (4, ("ios", "web"), "2021-01-01"),
+        ),
+    ],
+)
+def test_build_where_params(params, expected_where, expected_params):
+    assert sql.build_where_params(**params) == (expected_where, expected_params)
+
+
+def test_get_query_changed_file(tmp_path):
+    sql_path = str(tmp_path / "query.sql")
+    with open(sql_path, "w") as file:
+        file.write("SELECT {column}")
+    assert sql.get_query(sql_path, column="ltv") == "SELECT ltv"
+    with open(sql_path, "w") as file:
+        file.write("SELECT {column} FROM {table}")
+    os.utime(sql_path, ns=(0, os.stat(sql_path).st_mtime_ns + 1))
+    assert sql.get_query(sql_path, column="ltv", table="ads") == "SELECT ltv FROM ads"
+
+
+def test_get_query_wo_params(tmp_path):
+    sql_path = str(tmp_path / "query.sql")
+    with open(sql_path, "w") as file:
+        file.write("SELECT '{{}}'")
+    assert sql.get_query(sql_path) == "SELECT '{}'"
+    assert sql.get_query(sql_path) == "SELECT '{}'"
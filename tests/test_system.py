@@ -12,7 +12,10 @@ def test_fill_message():
 @pytest.mark.parametrize(
     "size_bytes, expected_verbose_size",
     [
+        (0, "0B"),
         (1, "1B"),
+        (1023, "1023B"),
+        (1024, "1.0KB"),
         (73856, "72.12KB"),
         (374563485, "357.21MB"),
         (678426357923, "631.83GB"),
@@ -24,6 +27,13 @@ def test_verbose_size(size_bytes, expected_verbose_size):
     assert actual_verbose_size == expected_verbose_size
 
 
+@pytest.mark.parametrize("power", range(0, 60, 3))
+def test_verbose_size_units(power):
+    expected_unit = ("B", "KB", "MB", "GB", "TB", "PB")[power // 10]
+    actual_verbose_size = system.verbose_size(1 << power)
+    assert actual_verbose_size.lstrip("0123456789.") == expected_unit
+
+
 def test_ram_usage():
     usage = system.ram_usage()
     assert "B" in usage
@@ -0,0 +1,19 @@
+import pytest
+import pandas as pd
+
+from .. import utils
+
+
+@pytest.fixture(scope="session")
+def clean_data():
+    return pd.read_csv(utils.data_path("cohorts.csv")).dropna()
+
+
+@pytest.fixture(scope="session")
+def hierarchical_encoder_target():
+    return pd.read_csv(utils.data_path("hierarchical_encoder.csv"))
+
+
+@pytest.fixture(scope="session")
+def target_encoder_target():
+    return pd.read_csv(utils.data_path("target_encoder.csv"))
@@ -35,4 +35,4 @@ def test_quantile_clipper(cols, q, expected, *kwargs):
     clipper.fit(X, y)
     result = clipper.transform(X, y)
     expected_result = np.array(expected)
-    assert np.allclose(result, expected_result, atol=1e-8, rtol=1e-5)
+    np.testing.assert_allclose(result, expected_result, rtol=1e-5, atol=1e-8)
@@ -1,21 +1,18 @@
 import pytest
 import numpy as np
-import pandas as pd
 
 from bi_utils import transformers
-from .. import utils
 
 
 @pytest.mark.parametrize("cols", [["media_source", "campaign_id"], ["media_source"], None])
 @pytest.mark.parametrize("C", [2, 10, 100])
-def test_target_encoder(cols, C, data):
-    data = data.dropna()
-    target_data = pd.read_csv(utils.data_path("target_encoder.csv"))
+def test_target_encoder(cols, C, clean_data, target_encoder_target):
+    target_data = target_encoder_target
     target_data = target_data[(target_data.cols.fillna("None") == str(cols)) & (target_data.C == C)]
     clipper = transformers.TargetEncoder(cols=cols, C=C)
-    X = data.drop(["conversion", "conversion_predict"], axis=1)
-    y = data["conversion"]
+    X = clean_data.drop(["conversion", "conversion_predict"], axis=1)
+    y = clean_data["conversion"]
     clipper.fit(X, y)
     result = clipper.transform(X)
     expected_result = target_data[result.columns]
-    assert np.allclose(result, expected_result)
+    np.testing.assert_allclose(result, expected_result, rtol=1e-5, atol=1e-8)
@@ -1,12 +1,15 @@
 import os
+import functools
 import pandas as pd
-from sklearn.model_selection import ParameterGrid
 from typing import Any, Dict
 
 
+DATA_DIR = os.path.join(os.path.dirname(__file__), "data")
+
+
+@functools.lru_cache(maxsize=None)
 def data_path(filename: str) -> str:
-    data_dir = os.path.join(os.path.dirname(__file__), "data")
-    data_path = os.path.join(data_dir, filename)
+    data_path = os.path.join(DATA_DIR, filename)
     return data_path
 
 
@@ -16,19 +19,32 @@ def make_target_data(
     param_grid: Dict[str, list],
     transform_y: bool = False,
 ) -> None:
+    # sklearn is imported only to generate data, not by every test module importing utils
+    from sklearn.model_selection import ParameterGrid
+
     data = pd.read_csv(data_path("cohorts.csv"))
     data = data.drop("conversion_predict", axis=1).dropna()
+    X = data.drop("conversion", axis=1)
+    y = data["conversion"]
     grid = ParameterGrid(param_grid)
-    target_data = pd.DataFrame()
-    for params in grid:
-        estimator = estimator_type(**params)
-        X = data.drop("conversion", axis=1)
-        y = data["conversion"]
-        estimator.fit(X, y)
-        estimator_data = estimator.transform(X, y) if transform_y else estimator.transform(X)
-        if not isinstance(estimator_data, pd.DataFrame):
-            estimator_data = pd.DataFrame({"conversion": estimator_data})
-        for param, value in params.items():
-            estimator_data[param] = str(value)
-        target_data = target_data.append(estimator_data, ignore_index=True)
+    estimators_data = [
+        _estimator_data(estimator_type, params, X, y, transform_y) for params in grid
+    ]
+    target_data = pd.concat(estimators_data, ignore_index=True)
     target_data.to_csv(data_path(filename), index=False)
+
+
+def _estimator_data(
+    estimator_type: Any,
+    params: Dict[str, Any],
+    X: pd.DataFrame,
+    y: pd.Series,
+    transform_y: bool,
+) -> pd.DataFrame:
+    estimator = estimator_type(**params)
+    estimator.fit(X, y)
+    estimator_data = estimator.transform(X, y) if transform_y else estimator.transform(X)
+    if not isinstance(estimator_data, pd.DataFrame):
+        estimator_data = pd.DataFrame({"conversion": estimator_data})
+    params_data = {param: str(value) for param, value in params.items()}
+    return estimator_data.assign(**params_data)